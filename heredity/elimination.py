@@ -0,0 +1,198 @@
+"""
+Exact inference for heredity.py by variable elimination.
+
+The model is the one in PROBS: each person's number of copies of the gene
+depends only on their parents' (or on the unconditional distribution, for
+people without parents), and their trait only on their own genes. So the
+joint probability is a product of one factor per person, over their genes
+and their parents', with the known traits folded into it.
+
+People's genes are summed out of that product one at a time, each step
+multiplying only the factors that mention the person summed out, and taking
+next the person with the fewest relatives left in them. The names each step
+spans form a cluster, and the clusters form a tree (a junction tree): every
+cluster passes what it summed out on to the cluster of the next of its names
+to go. Messages are passed up that tree and then back down, after which
+each cluster holds everything needed for the distributions of its people,
+so all of them come out of two passes.
+
+In a family tree the person summed out next always has at most two
+relatives left, so clusters hold at most three people and the work grows
+linearly with the size of the family, where enumerating every assignment,
+as heredity.main does, grows exponentially.
+"""
+import itertools
+
+GENES = (0, 1, 2)
+
+
+def passing(genes, mutation):
+    """
+    Returns the probability that a parent with `genes` copies of the gene
+    passes one on to their child.
+    """
+    if genes == 2:
+        return 1 - mutation
+    if genes == 1:
+        return 0.5
+    return mutation
+
+
+def inheritance(mother, father, mutation):
+    """
+    Returns the list of probabilities that a child has 0, 1 and 2 copies
+    of the gene, given how many copies their mother and father have.
+    """
+    m = passing(mother, mutation)
+    f = passing(father, mutation)
+    return [(1 - m) * (1 - f), m * (1 - f) + (1 - m) * f, m * f]
+
+
+def person_factors(people, probs):
+    """
+    Returns one factor per person, as a (variables, table) pair where
+    `variables` is a tuple of names and `table` maps each tuple of their
+    gene counts to a probability.
+    """
+    factors = []
+    for name, person in people.items():
+        trait = person["trait"]
+        evidence = {
+            genes: 1 if trait is None else probs["trait"][genes][trait]
+            for genes in GENES
+        }
+        mother, father = person["mother"], person["father"]
+        if mother is None and father is None:
+            table = {
+                (genes,): probs["gene"][genes] * evidence[genes]
+                for genes in GENES
+            }
+            factors.append(((name,), table))
+        elif mother is not None and father is not None:
+            table = dict()
+            for m, f in itertools.product(GENES, repeat=2):
+                child = inheritance(m, f, probs["mutation"])
+                for genes in GENES:
+                    table[(genes, m, f)] = child[genes] * evidence[genes]
+            factors.append(((name, mother, father), table))
+        else:
+            raise ValueError(f"{name} must have both parents or neither")
+    return factors
+
+
+def combine(factors, keep):
+    """
+    Returns the factor over the names in `keep` obtained by multiplying
+    `factors` together and summing every other name out of the product,
+    rescaled to sum to 1. Only the ratios between a factor's entries matter
+    to the distributions they end up in, and rescaling keeps products over
+    large families from underflowing to 0. Raises ValueError if the product
+    is 0 everywhere, which means the known traits are impossible.
+    """
+    variables = list(keep)
+    for names, _ in factors:
+        for name in names:
+            if name not in variables:
+                variables.append(name)
+
+    table = dict()
+    for values in itertools.product(GENES, repeat=len(variables)):
+        assignment = dict(zip(variables, values))
+        p = 1
+        for names, factor in factors:
+            p *= factor[tuple(assignment[name] for name in names)]
+            if not p:
+                break
+        key = values[:len(keep)]
+        table[key] = table.get(key, 0) + p
+
+    total = sum(table.values())
+    if not total:
+        raise ValueError("the known traits have probability 0")
+    return tuple(keep), {key: p / total for key, p in table.items()}
+
+
+def elimination_order(factors):
+    """
+    Returns (order, clusters): an order in which to sum people out of the
+    product of `factors`, always taking next the one with the fewest
+    relatives left, and for each of them the names its elimination spans.
+    """
+    relatives = dict()
+    for names, _ in factors:
+        for name in names:
+            relatives.setdefault(name, set()).update(names)
+    for name in relatives:
+        relatives[name].discard(name)
+
+    order = []
+    clusters = []
+    while relatives:
+        name = min(relatives, key=lambda n: (len(relatives[n]), n))
+        others = relatives.pop(name)
+        for other in others:
+            relatives[other].discard(name)
+            relatives[other].update(others - {other})
+        order.append(name)
+        clusters.append(others | {name})
+    return order, clusters
+
+
+def marginals(people, probs):
+    """
+    Returns, for each person, their "gene" and "trait" distributions given
+    the known traits, in the same form heredity.main computes them.
+    """
+    factors = person_factors(people, probs)
+    order, clusters = elimination_order(factors)
+    position = {name: i for i, name in enumerate(order)}
+
+    # Link each cluster to the one where the next of its names is summed
+    # out, and give each factor to the cluster of its first name summed out
+    parent = [None] * len(order)
+    children = [[] for i in range(len(order))]
+    separators = []
+    for i, cluster in enumerate(clusters):
+        separator = sorted(cluster - {order[i]}, key=position.get)
+        separators.append(tuple(separator))
+        if separator:
+            parent[i] = position[separator[0]]
+            children[parent[i]].append(i)
+    assigned = [[] for i in range(len(order))]
+    for factor in factors:
+        assigned[min(position[name] for name in factor[0])].append(factor)
+
+    # Pass messages up the tree of clusters, then back down
+    up = [None] * len(order)
+    for i in range(len(order)):
+        up[i] = combine(assigned[i] + [up[c] for c in children[i]],
+                        separators[i])
+    down = [None] * len(order)
+    for i in reversed(range(len(order))):
+        p = parent[i]
+        if p is None:
+            continue
+        incoming = [up[c] for c in children[p] if c != i]
+        if down[p] is not None:
+            incoming.append(down[p])
+        down[i] = combine(assigned[p] + incoming, separators[i])
+
+    probabilities = dict()
+    for person in people:
+        i = position[person]
+        incoming = [up[c] for c in children[i]]
+        if down[i] is not None:
+            incoming.append(down[i])
+        _, table = combine(assigned[i] + incoming, (person,))
+        genes = {g: table[(g,)] for g in GENES}
+
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(genes[g] * probs["trait"][g][True] for g in GENES)
+        else:
+            has_trait = 1.0 if trait else 0.0
+        probabilities[person] = {
+            "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
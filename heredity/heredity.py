@@ -2,6 +2,8 @@ import csv
 import itertools
 import sys
 
+from elimination import marginals
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -40,48 +42,59 @@ PROBS = {
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    options = sys.argv[2:]
+    if len(sys.argv) < 2 or options not in ([], ["--elimination"], ["--vectorized"]):
+        sys.exit("Usage: python heredity.py data.csv [--elimination | --vectorized]")
     people = load_data(sys.argv[1])
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {
-            "gene": {
-                2: 0,
-                1: 0,
-                0: 0
-            },
-            "trait": {
-                True: 0,
-                False: 0
+
+    # Variable elimination gives the same probabilities without going
+    # through every assignment, so it also works for large families
+    if options == ["--elimination"]:
+        probabilities = marginals(people, PROBS)
+    # The vectorized enumeration scores assignments with NumPy tables
+    elif options == ["--vectorized"]:
+        from tables import enumerate_marginals
+        probabilities = enumerate_marginals(people, PROBS)
+    else:
+        # Keep track of gene and trait probabilities for each person
+        probabilities = {
+            person: {
+                "gene": {
+                    2: 0,
+                    1: 0,
+                    0: 0
+                },
+                "trait": {
+                    True: 0,
+                    False: 0
+                }
             }
+            for person in people
         }
-        for person in people
-    }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+        # Loop over all sets of people who might have the trait
+        names = set(people)
+        for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+            # Check if current set of people violates known information
+            fails_evidence = any(
+                (people[person]["trait"] is not None and
+                 people[person]["trait"] != (person in have_trait))
+                for person in names
+            )
+            if fails_evidence:
+                continue
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+            # Loop over all sets of people who might have the gene
+            for one_gene in powerset(names):
+                for two_genes in powerset(names - one_gene):
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+                    # Update probabilities with new joint probability
+                    p = joint_probability(people, one_gene, two_genes, have_trait)
+                    update(probabilities, one_gene, two_genes, have_trait, p)
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+        # Ensure probabilities sum to 1
+        normalize(probabilities)
 
     # Print results
     for person in people:
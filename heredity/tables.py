@@ -0,0 +1,139 @@
+"""
+Conditional probability tables for heredity.py as NumPy arrays, and a
+vectorized joint probability.
+
+The tables are indexed by number of copies of the gene:
+    gene_table(probs)[g]                 P(genes = g) with no parents
+    inheritance_table(probs)[m, f, g]    P(genes = g | mother m, father f)
+    trait_table(probs)[g, t]             P(trait = t | genes = g)
+so the joint probability of a whole assignment is one lookup per person in
+each table, and many assignments, stacked as rows of arrays, are scored
+with one fancy-indexing pass per person instead of one call each.
+"""
+import itertools
+
+import numpy as np
+
+from elimination import GENES, inheritance
+
+
+def gene_table(probs):
+    """
+    Returns P(genes) for people without parents.
+    """
+    return np.array([probs["gene"][g] for g in GENES])
+
+
+def inheritance_table(probs):
+    """
+    Returns P(child genes | mother genes, father genes).
+    """
+    table = np.zeros((3, 3, 3))
+    for m, f in itertools.product(GENES, repeat=2):
+        table[m, f] = inheritance(m, f, probs["mutation"])
+    return table
+
+
+def trait_table(probs):
+    """
+    Returns P(trait | genes), with False and True as indices 0 and 1.
+    """
+    return np.array([[probs["trait"][g][False], probs["trait"][g][True]]
+                     for g in GENES])
+
+
+def tables(probs):
+    """
+    Returns the (gene, inheritance, trait) tables of `probs`, to build them
+    once for many calls to joint_probabilities.
+    """
+    return gene_table(probs), inheritance_table(probs), trait_table(probs)
+
+
+def encode(people, assignments):
+    """
+    Returns (genes, traits) arrays with one row per (one_gene, two_genes,
+    have_trait) assignment and one column per person, in the order of
+    `people`: the number of copies of the gene and whether they have the
+    trait.
+    """
+    names = list(people)
+    genes = np.zeros((len(assignments), len(names)), dtype=np.intp)
+    traits = np.zeros((len(assignments), len(names)), dtype=np.intp)
+    for row, (one_gene, two_genes, have_trait) in enumerate(assignments):
+        for column, name in enumerate(names):
+            genes[row, column] = (2 if name in two_genes else
+                                  1 if name in one_gene else 0)
+            traits[row, column] = name in have_trait
+    return genes, traits
+
+
+def joint_probabilities(people, genes, traits, probs, model=None):
+    """
+    Returns the joint probability of each row of `genes` and `traits`
+    (arrays with a column per person, in the order of `people`), the same
+    as heredity.joint_probability gives for that assignment. `model` holds
+    the tables(probs), which are built here if it isn't given.
+    """
+    names = {name: column for column, name in enumerate(people)}
+    prior, inherited, trait = model if model is not None else tables(probs)
+
+    joint = np.ones(len(genes))
+    for name, person in people.items():
+        column = names[name]
+        if person["mother"] is None and person["father"] is None:
+            joint *= prior[genes[:, column]]
+        elif person["mother"] is None or person["father"] is None:
+            raise ValueError(f"{name} must have both parents or neither")
+        else:
+            joint *= inherited[genes[:, names[person["mother"]]],
+                               genes[:, names[person["father"]]],
+                               genes[:, column]]
+        joint *= trait[genes[:, column], traits[:, column]]
+    return joint
+
+
+def score(people, assignments, probs):
+    """
+    Returns the joint probability of each (one_gene, two_genes, have_trait)
+    assignment in `assignments`.
+    """
+    genes, traits = encode(people, assignments)
+    return joint_probabilities(people, genes, traits, probs)
+
+
+def enumerate_marginals(people, probs):
+    """
+    Returns, for each person, their "gene" and "trait" distributions given
+    the known traits, summing the joint probability of every assignment as
+    heredity.main does, but scoring all gene assignments at once for each
+    way of giving traits to the people whose trait is unknown.
+    """
+    names = list(people)
+    n = len(names)
+    genes = np.indices((3,) * n).reshape(n, -1).T
+    unknown = [c for c, name in enumerate(names)
+               if people[name]["trait"] is None]
+
+    model = tables(probs)
+    gene_sums = np.zeros((n, 3))
+    trait_sums = np.zeros((n, 2))
+    traits = np.empty_like(genes)
+    for c, name in enumerate(names):
+        traits[:, c] = bool(people[name]["trait"])
+    for values in itertools.product((0, 1), repeat=len(unknown)):
+        traits[:, unknown] = values
+        joint = joint_probabilities(people, genes, traits, probs, model)
+        for c in range(n):
+            gene_sums[c] += np.bincount(genes[:, c], joint, minlength=3)
+            trait_sums[c] += np.bincount(traits[:, c], joint, minlength=2)
+
+    gene_sums /= gene_sums.sum(axis=1, keepdims=True)
+    trait_sums /= trait_sums.sum(axis=1, keepdims=True)
+    return {
+        name: {
+            "gene": {g: gene_sums[c, g] for g in (2, 1, 0)},
+            "trait": {True: trait_sums[c, 1], False: trait_sums[c, 0]}
+        }
+        for c, name in enumerate(names)
+    }
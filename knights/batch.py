@@ -0,0 +1,112 @@
+"""
+Solves many puzzle files in parallel and reports how long each one took.
+
+Usage: python batch.py [-w WORKERS] [-m METHOD] PATH...
+
+Each PATH is a puzzle file in one of the formats read by
+formulas.load_puzzle, or a directory whose .txt and .json files are all
+solved. For every puzzle, the queries its knowledge entails are printed along
+with the time spent parsing and solving it.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from formulas import load_puzzle
+from logic import model_check, model_check_all
+from sat import KnowledgeBase
+
+
+def entails_all(knowledge, queries):
+    """
+    Returns whether `knowledge` entails each query, reusing one solver.
+    """
+    kb = KnowledgeBase(knowledge)
+    return [kb.entails(query) for query in queries]
+
+
+METHODS = {
+    "model_check": lambda knowledge, queries: [
+        model_check(knowledge, query) for query in queries
+    ],
+    "model_check_all": model_check_all,
+    "sat": entails_all,
+}
+
+
+def solve(filename, method):
+    """
+    Returns (filename, entailed queries, seconds) for one puzzle file, or
+    (filename, error message, seconds) if it could not be solved.
+    """
+    start = time.perf_counter()
+    try:
+        knowledge, queries = load_puzzle(filename)
+        results = METHODS[method](knowledge, queries)
+        entailed = [query.formula() for query, result in zip(queries, results)
+                    if result]
+    except (OSError, ValueError) as e:
+        entailed = f"error: {e}"
+    except Exception as e:
+        # Anything else still only fails this puzzle, not the whole batch
+        entailed = f"error: {type(e).__name__}: {e}"
+    return filename, entailed, time.perf_counter() - start
+
+
+def puzzle_files(paths):
+    """
+    Returns the puzzle files named by `paths`, expanding directories.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith((".txt", ".json"))
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument("-m", "--method", choices=sorted(METHODS),
+                        default="sat", help="entailment method")
+    args = parser.parse_args()
+
+    files = puzzle_files(args.paths)
+    if not files:
+        sys.exit("No puzzle files found.")
+
+    start = time.perf_counter()
+    times = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = pool.map(solve, files, [args.method] * len(files),
+                           chunksize=max(1, len(files) // 64))
+        for filename, entailed, seconds in results:
+            times.append(seconds)
+            if isinstance(entailed, str):
+                failed += 1
+                print(f"{filename}: {entailed}")
+            else:
+                print(f"{filename}: {1000 * seconds:.2f} ms")
+                for formula in entailed:
+                    print(f"    {formula}")
+    elapsed = time.perf_counter() - start
+
+    times.sort()
+    print(f"Solved {len(files) - failed} of {len(files)} puzzles "
+          f"in {elapsed:.2f}s ({len(files) / elapsed:.1f} puzzles/s)")
+    print(f"Per puzzle: median {1000 * times[len(times) // 2]:.2f} ms, "
+          f"max {1000 * times[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Text format for logic.py sentences, and loaders for puzzle files.
+
+Formulas use these connectives, from loosest to tightest binding:
+    <=>  <->          Biconditional
+    =>   ->           Implication (right associative)
+    |    ∨            Or
+    &    ∧            And
+    ~    !    ¬       Not
+and the constants ⊤ (true, the empty And()) and ⊥ (false, the empty Or()).
+Parentheses group. A symbol is either a double-quoted name or any run of
+other characters, with surrounding whitespace stripped, so both `AKnight`
+and `(A is a Knight)` are symbols.
+
+The Unicode forms are the ones Sentence.formula() prints, so its output
+parses back to an equivalent sentence, as long as no symbol name holds an
+operator, a constant or a double quote (formula() doesn't quote names).
+
+A puzzle file is either
+    - text: one knowledge sentence per line, lines starting with `?` are
+      queries, blank lines and lines starting with `#` are ignored
+    - JSON (a .json file): {"knowledge": [formulas], "queries": [formulas]}
+"""
+import json
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Operators in the order they are matched, longest first
+OPERATORS = {
+    "<=>": "<=>", "<->": "<=>",
+    "=>": "=>", "->": "=>",
+    "|": "|", "∨": "|",
+    "&": "&", "∧": "&",
+    "~": "~", "!": "~", "¬": "~",
+    "⊤": "⊤", "⊥": "⊥",
+    "(": "(", ")": ")",
+}
+BINARY = [("<=>", Biconditional), ("=>", Implication),
+          ("|", Or), ("&", And)]
+
+
+def tokenize(text):
+    """
+    Returns the tokens of a formula as a list of (kind, value) pairs, where
+    kind is "op" for operators and parentheses and "name" for symbols.
+    """
+    tokens = []
+    i = 0
+    name_start = None
+
+    def end_name(i):
+        if name_start is not None:
+            name = text[name_start:i].strip()
+            if name:
+                tokens.append(("name", name))
+
+    while i < len(text):
+        for op in OPERATORS:
+            if text.startswith(op, i):
+                end_name(i)
+                name_start = None
+                tokens.append(("op", OPERATORS[op]))
+                i += len(op)
+                break
+        else:
+            if text[i] == '"':
+                end_name(i)
+                end = text.find('"', i + 1)
+                if end < 0:
+                    raise ValueError(f"unterminated quote in {text!r}")
+                tokens.append(("name", text[i + 1:end]))
+                name_start = None
+                i = end + 1
+            else:
+                if name_start is None:
+                    name_start = i
+                i += 1
+    end_name(i)
+    return tokens
+
+
+def parse(text):
+    """
+    Returns the Sentence written in `text`.
+    """
+    tokens = tokenize(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else (None, None)
+
+    def expect(op):
+        nonlocal position
+        if peek() != ("op", op):
+            raise ValueError(f"expected {op!r} at token {position} in {text!r}")
+        position += 1
+
+    def binary(level):
+        """Parses a chain of operators of BINARY[level] or tighter."""
+        nonlocal position
+        if level == len(BINARY):
+            return unary()
+        op, cls = BINARY[level]
+        operands = [binary(level + 1)]
+        while peek() == ("op", op):
+            position += 1
+            operands.append(binary(level + 1))
+        if len(operands) == 1:
+            return operands[0]
+        if cls is Implication:
+            sentence = operands[-1]
+            for operand in reversed(operands[:-1]):
+                sentence = Implication(operand, sentence)
+            return sentence
+        if cls is Biconditional:
+            sentence = operands[0]
+            for operand in operands[1:]:
+                sentence = Biconditional(sentence, operand)
+            return sentence
+        return cls(*operands)
+
+    def unary():
+        nonlocal position
+        kind, value = peek()
+        if (kind, value) == ("op", "~"):
+            position += 1
+            return Not(unary())
+        if (kind, value) == ("op", "⊤"):
+            position += 1
+            return And()
+        if (kind, value) == ("op", "⊥"):
+            position += 1
+            return Or()
+        if (kind, value) == ("op", "("):
+            position += 1
+            sentence = binary(0)
+            expect(")")
+            return sentence
+        if kind == "name":
+            position += 1
+            return Symbol(value)
+        if kind is None:
+            raise ValueError(f"unexpected end of formula in {text!r}")
+        raise ValueError(f"unexpected {value!r} at token {position} in {text!r}")
+
+    try:
+        sentence = binary(0)
+    except RecursionError:
+        raise ValueError(f"formula nested too deeply: {text[:40]!r}")
+    if position != len(tokens):
+        raise ValueError(f"unexpected {tokens[position][1]!r} at token "
+                         f"{position} in {text!r}")
+    return sentence
+
+
+def load_puzzle(filename):
+    """
+    Returns (knowledge, queries) read from a puzzle file: the conjunction
+    of its knowledge sentences and the list of its queries.
+    """
+    with open(filename, encoding="utf-8") as f:
+        if filename.endswith(".json"):
+            data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError(f"{filename}: expected a JSON object")
+            knowledge = data.get("knowledge", [])
+            queries = data.get("queries", [])
+            for key, formulas in [("knowledge", knowledge),
+                                  ("queries", queries)]:
+                if not (isinstance(formulas, list) and
+                        all(isinstance(line, str) for line in formulas)):
+                    raise ValueError(f"{filename}: {key!r} must be a list "
+                                     f"of formula strings")
+        else:
+            knowledge, queries = [], []
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("?"):
+                    queries.append(line[1:])
+                else:
+                    knowledge.append(line)
+    return (And(*[parse(line) for line in knowledge]),
+            [parse(line) for line in queries])
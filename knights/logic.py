@@ -1,7 +1,48 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Sentences are immutable and hash-consed: building a sentence equal to a
+    live one returns that same object, so equal subsentences share memory,
+    equality is identity, and each node's hash and symbol set are computed
+    once, when it is built.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, keyed by its class name and arguments
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key, symbols, **fields):
+        """Returns the live sentence of class cls with the given key,
+        building it from `fields` if there is none."""
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", symbols)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.__getnewargs__())
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +54,26 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return self._symbols
+
+    def subsentences(self):
+        """Returns the sentences the logical sentence is built from."""
+        return ()
+
+    def expression(self, operands, index):
+        """Returns a Python expression evaluating the logical sentence over
+        a sequence `m` of truth values, where `operands` holds the names of
+        the values of its subsentences and `index` maps each symbol to its
+        position in `m`."""
+        raise Exception("nothing to compile")
+
+    def bits(self, operands, columns, full):
+        """Evaluates the logical sentence on many models at once, given the
+        values of its subsentences in `operands`. `columns` maps each symbol
+        to an integer whose bit k is its value in model k, and `full` has a
+        bit set for every model; returns the integer whose bit k is the
+        sentence's value in model k."""
+        raise Exception("nothing to evaluate")
 
     @classmethod
     def validate(cls, sentence):
@@ -34,7 +94,7 @@ class Sentence():
                         return False
                     count -= 1
             return count == 0
-        if not len(s) or s.isalpha() or (
+        if not len(s) or s.isalpha() or s in ("⊤", "⊥") or (
             s[0] == "(" and s[-1] == ")" and balanced(s[1:-1])
         ):
             return s
@@ -43,15 +103,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return cls.intern(("symbol", name), frozenset([name]), name=name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __getnewargs__(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -65,20 +123,26 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def expression(self, operands, index):
+        return f"m[{index[self.name]}]"
+
+    def bits(self, operands, columns, full):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern(("not", operand), operand.symbols(),
+                          operand=operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __getnewargs__(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,24 +153,32 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def subsentences(self):
+        return (self.operand,)
+
+    def expression(self, operands, index):
+        return f"not {operands[0]}"
+
+    def bits(self, operands, columns, full):
+        return full ^ operands[0]
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        return cls.intern(
+            ("and",) + conjuncts,
+            frozenset().union(*[conjunct.symbols()
+                                for conjunct in conjuncts]),
+            conjuncts=conjuncts
         )
 
+    def __getnewargs__(self):
+        return self.conjuncts
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,36 +186,55 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """Sentences are immutable, so a conjunction can't be added to;
+        build a new one with And(*knowledge.conjuncts, conjunct)."""
+        raise AttributeError(
+            "sentences are immutable; use And(*knowledge.conjuncts, "
+            "conjunct) to build a conjunction with another conjunct"
+        )
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def subsentences(self):
+        return self.conjuncts
+
+    def expression(self, operands, index):
+        if not operands:
+            return "True"
+        return " and ".join(operands)
+
+    def bits(self, operands, columns, full):
+        value = full
+        for operand in operands:
+            value &= operand
+        return value
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        return cls.intern(
+            ("or",) + disjuncts,
+            frozenset().union(*[disjunct.symbols()
+                                for disjunct in disjuncts]),
+            disjuncts=disjuncts
         )
 
+    def __getnewargs__(self):
+        return self.disjuncts
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -152,29 +243,42 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def subsentences(self):
+        return self.disjuncts
+
+    def expression(self, operands, index):
+        if not operands:
+            return "False"
+        return " or ".join(operands)
+
+    def bits(self, operands, columns, full):
+        value = 0
+        for operand in operands:
+            value |= operand
+        return value
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return cls.intern(
+            ("implies", antecedent, consequent),
+            antecedent.symbols() | consequent.symbols(),
+            antecedent=antecedent, consequent=consequent
+        )
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __getnewargs__(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +292,30 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def subsentences(self):
+        return (self.antecedent, self.consequent)
+
+    def expression(self, operands, index):
+        return f"not {operands[0]} or {operands[1]}"
+
+    def bits(self, operands, columns, full):
+        return (full ^ operands[0]) | operands[1]
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls.intern(
+            ("biconditional", left, right),
+            left.symbols() | right.symbols(),
+            left=left, right=right
+        )
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __getnewargs__(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,47 +327,182 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def subsentences(self):
+        return (self.left, self.right)
+
+    def expression(self, operands, index):
+        return f"{operands[0]} == {operands[1]}"
+
+    def bits(self, operands, columns, full):
+        return full ^ (operands[0] ^ operands[1])
+
+
+# Deepest nesting compile_sentence leaves inline, well under the limit of
+# Python's parser
+COMPILE_DEPTH = 50
+
+
+def compile_sentence(sentence, symbols):
+    """Returns a function evaluating the sentence on a sequence of truth
+    values, one per name in `symbols`, in order. Subsentences are inlined
+    into one expression, so `and` and `or` short-circuit, except that any
+    used by more than one parent, or nested more than COMPILE_DEPTH levels
+    deep, is first assigned to a temporary of its own. Every distinct node
+    is then compiled once, so the code grows linearly with the number of
+    them, and it is built without recursion, so it compiles however deeply
+    the sentence nests."""
+    index = {name: i for i, name in enumerate(symbols)}
+
+    # Count the parents of every distinct node
+    parents = {sentence: 0}
+    stack = [sentence]
+    while stack:
+        for child in stack.pop().subsentences():
+            if child not in parents:
+                parents[child] = 0
+                stack.append(child)
+            parents[child] += 1
+
+    code = dict()
+    depth = dict()
+    lines = []
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in code:
+            continue
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False)
+                         for child in reversed(node.subsentences()))
+            continue
+        children = node.subsentences()
+        value = node.expression([code[child] for child in children], index)
+        if isinstance(node, Symbol):
+            code[node], depth[node] = value, 0
+            continue
+        code[node] = f"({value})"
+        depth[node] = 1 + max((depth[child] for child in children),
+                              default=0)
+        if parents[node] > 1 or depth[node] > COMPILE_DEPTH:
+            name = f"t{len(lines)}"
+            lines.append(f"    {name} = {code[node]}")
+            code[node], depth[node] = name, 0
+    lines.append(f"    return {code[sentence]}")
+    namespace = dict()
+    exec("def evaluate(m):\n" + "\n".join(lines), namespace)
+    return namespace["evaluate"]
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = list(knowledge.symbols() | query.symbols())
+
+    # Evaluate both sentences as single functions over a list of values
+    knowledge_true = compile_sentence(knowledge, symbols)
+    query_true = compile_sentence(query, symbols)
+    model = [False] * len(symbols)
+
+    # Visit all 2^n models in Gray-code order, flipping one symbol between
+    # consecutive models: before model k + 1, the symbol at the lowest set
+    # bit of k + 1
+    for k in range(1 << len(symbols)):
+        if k:
+            i = (k & -k).bit_length() - 1
+            model[i] = not model[i]
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge_true(model) and not query_true(model):
+            return False
+    return True
+
+
+def truth_columns(n):
+    """Returns the columns of a truth table over n symbols, as integers
+    whose bit k is the value of that symbol in model k (the symbol's bit of
+    k), along with the integer with all 2^n bits set."""
+    size = 1 << n
+    columns = []
+    for i in range(n):
+        width = 1 << i
+        column = ((1 << width) - 1) << width
+        width *= 2
+        while width < size:
+            column |= column << width
+            width *= 2
+        columns.append(column)
+    return columns, (1 << size) - 1
+
+
+def sentence_bits(sentence, columns, full, values=None):
+    """Evaluates the sentence on many models at once, as Sentence.bits
+    describes. Nodes are evaluated children first from an explicit stack,
+    so sentences nest as deeply as they like, and each distinct node only
+    once; `values` caches the value of every node evaluated, and can be
+    shared between calls with the same columns."""
+    if values is None:
+        values = dict()
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in values:
+            continue
+        children = node.subsentences()
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        values[node] = node.bits([values[child] for child in children],
+                                 columns, full)
+    return values[sentence]
+
+
+def model_check_bits(knowledge, query, width=16):
+    """Checks if knowledge base entails query, evaluating both sentences on
+    2^width models at a time: each symbol is a bit vector holding its column
+    of the truth table, so one bitwise pass over a sentence evaluates it in
+    every model of the block."""
+    return model_check_all(knowledge, [query], width)[0]
+
+
+def model_check_all(knowledge, queries, width=16):
+    """Checks which of the queries the knowledge base entails, enumerating
+    the models of the knowledge base only once, 2^width at a time as in
+    model_check_bits. Returns a list of booleans in the order of
+    `queries`."""
+    queries = list(queries)
+    symbols = list(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    low, high = symbols[:width], symbols[width:]
+    columns, full = truth_columns(len(low))
+    columns = dict(zip(low, columns))
+
+    # Symbols beyond the block width are constant within a block, so
+    # enumerate their values block by block
+    entailed = [True] * len(queries)
+    for block in range(1 << len(high)):
+        for i, name in enumerate(high):
+            columns[name] = full if block >> i & 1 else 0
+
+        # Every query must hold in each model of this block where the
+        # knowledge base holds
+        values = dict()
+        knowledge_bits = sentence_bits(knowledge, columns, full, values)
+        if not knowledge_bits:
+            continue
+        for k, query in enumerate(queries):
+            if not entailed[k]:
+                continue
+            if knowledge_bits & (full ^ sentence_bits(query, columns, full,
+                                                      values)):
+                entailed[k] = False
+        if not any(entailed):
+            break
+    return entailed
@@ -0,0 +1,187 @@
+"""
+Model counting and enumeration for logic.py sentences.
+
+Both work on the Tseitin encoding from sat.py. Its auxiliary variables are
+each defined as equivalent to a subsentence, so every model of a sentence
+extends to exactly one model of its clauses, and counts and models over the
+clauses are counts and models over the sentence's symbols.
+"""
+from sat import CNF, Solver
+
+
+def propagate(clauses):
+    """
+    Propagates the unit clauses of `clauses` (a list of frozensets of
+    literals). Returns the clauses left, without the literals made false,
+    and the number of variables that dropped out of them without being
+    assigned; or (None, 0) if propagation runs into an empty clause.
+
+    Each clause keeps a count of its literals still unassigned, and an
+    index from each literal to the clauses holding it finds the ones a new
+    assignment affects, so propagation takes time in proportion to the
+    size of the clauses, however many units it goes through.
+    """
+    occurrences = dict()
+    for k, clause in enumerate(clauses):
+        for literal in clause:
+            occurrences.setdefault(literal, []).append(k)
+    unassigned = [len(clause) for clause in clauses]
+    satisfied = [False] * len(clauses)
+    value = dict()
+    units = [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    while units:
+        literal = units.pop()
+        if abs(literal) in value:
+            if value[abs(literal)] != (literal > 0):
+                return None, 0
+            continue
+        value[abs(literal)] = literal > 0
+        for k in occurrences.get(literal, ()):
+            satisfied[k] = True
+        for k in occurrences.get(-literal, ()):
+            if satisfied[k]:
+                continue
+            unassigned[k] -= 1
+            if not unassigned[k]:
+                return None, 0
+            if unassigned[k] == 1:
+                units.extend(other for other in clauses[k]
+                             if abs(other) not in value)
+
+    left = [frozenset(literal for literal in clause
+                      if abs(literal) not in value)
+            for k, clause in enumerate(clauses) if not satisfied[k]]
+    if any(not clause for clause in left):
+        return None, 0
+    variables = {abs(literal) for clause in clauses for literal in clause}
+    remaining = {abs(literal) for clause in left for literal in clause}
+    return left, len(variables) - len(value) - len(remaining)
+
+
+def count_clauses(clauses, cache):
+    """
+    Returns the number of assignments to the variables of `clauses` (a
+    list of frozensets of literals) that satisfy them all.
+
+    Unit clauses are propagated first. The remaining clauses are split into
+    components that share no variables, whose counts multiply; each
+    component is cached, then counted by branching on its most frequent
+    variable. The branching runs from an explicit stack of frames, each a
+    [kind, component, count so far, work left] list: "count" frames
+    multiply the counts of the components of their clauses, and "split"
+    frames add up the counts of the two branches of a component.
+    """
+
+    def count(clauses):
+        left, free = propagate(clauses)
+        if left is None:
+            return ["count", None, 0, []]
+        total = 2 ** free
+        pending = []
+        for component in components(left):
+            key = frozenset(component)
+            if key in cache:
+                total *= cache[key]
+            else:
+                pending.append(key)
+        return ["count", None, total, pending if total else []]
+
+    def split(key):
+        if key in cache:
+            return ["split", key, cache[key], []]
+        counts = dict()
+        for clause in key:
+            for literal in clause:
+                counts[abs(literal)] = counts.get(abs(literal), 0) + 1
+        variable = max(counts, key=counts.get)
+        component = list(key)
+        return ["split", key, 0, [component + [frozenset([literal])]
+                                  for literal in (variable, -variable)]]
+
+    stack = [count(clauses)]
+    while True:
+        kind, key, total, pending = stack[-1]
+        if pending:
+            work = pending.pop()
+            stack.append(split(work) if kind == "count" else count(work))
+            continue
+        stack.pop()
+        if kind == "split":
+            cache[key] = total
+        if not stack:
+            return total
+        parent = stack[-1]
+        if parent[0] == "count":
+            parent[2] *= total
+            if not parent[2]:
+                parent[3].clear()
+        else:
+            parent[2] += total
+
+
+def components(clauses):
+    """
+    Returns the clauses grouped into lists that share no variables.
+    """
+    parent = dict()
+
+    def find(v):
+        while parent.setdefault(v, v) != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for clause in clauses:
+        first = find(abs(next(iter(clause))))
+        for literal in clause:
+            parent[find(abs(literal))] = first
+
+    groups = dict()
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return list(groups.values())
+
+
+def count_models(sentence, symbols=()):
+    """
+    Returns the number of models of `sentence` over its symbols together
+    with the names in `symbols`.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    clauses = [frozenset(clause) for clause in cnf.clauses]
+    if any(not clause for clause in clauses):
+        return 0
+    used = {abs(literal) for clause in clauses for literal in clause}
+    names = sentence.symbols() | set(symbols)
+    free = sum(1 for name in names
+               if cnf.variables.get(name) not in used)
+    return count_clauses(clauses, dict()) * 2 ** free
+
+
+def iter_models(sentence, symbols=()):
+    """
+    Yields every model of `sentence` over its symbols together with the
+    names in `symbols`, as dicts from symbol name to bool, one at a time.
+
+    Each model found by the SAT solver is blocked with a clause before the
+    next one is searched for, so models are never repeated.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.clauses)
+    names = sorted(sentence.symbols() | set(symbols))
+    bound = [name for name in names if name in cnf.variables]
+    free = [name for name in names if name not in cnf.variables]
+    while solver.solve():
+        model = {name: solver.model[cnf.variables[name]] for name in bound}
+        for k in range(2 ** len(free)):
+            model.update((name, bool(k >> i & 1))
+                         for i, name in enumerate(free))
+            yield dict(model)
+        if not bound:
+            return
+        solver.add_clause([
+            -cnf.variables[name] if model[name] else cnf.variables[name]
+            for name in bound
+        ])
@@ -66,10 +66,8 @@ knowledge3 = And(
     #Either they're telling the truth, or they're a Knave
     Or( Or(AKnight,AKnave) , AKnave ), #A's clause
     #Game definitions make it impossible for both to be true both at the same time.
-    if Or(AKnight,AKnave) == AKnave:  #If A's clause is equivalent to what B states that A said, B is a knight, otherwise he isn't
-        BKnight
-    else:
-        BKnave
+    #If A's clause is equivalent to what B states that A said, B is a knight, otherwise he isn't
+    BKnight if Or(AKnight,AKnave) == AKnave else BKnave,
     Or( CKnave, BKnave ), #B's second clause
     Not( And(CKnave, BKnave) ), #Can't happen both at once
     Or( AKnight , CKnave ), #C's clause
@@ -90,8 +88,8 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            for symbol, entailed in zip(symbols, model_check_all(knowledge, symbols)):
+                if entailed:
                     print(f"    {symbol}")
 
 
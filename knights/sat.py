@@ -0,0 +1,532 @@
+"""
+Satisfiability backend for logic.py.
+
+Sentences are compiled to conjunctive normal form with the Tseitin encoding,
+which introduces one auxiliary variable per connective and so stays linear in
+the size of the sentence, and then decided by a CDCL (conflict-driven clause
+learning) solver. Knowledge entails a query exactly when knowledge ∧ ¬query
+is unsatisfiable, which lets entailment scale to thousands of symbols instead
+of the 2^n models `model_check` enumerates.
+
+Variables are positive integers; a literal is a variable (true) or its
+negation (false), and a clause is a list of literals.
+"""
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Tseitin encoding of logical sentences into clauses.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = dict()
+        self.names = dict()
+        self.count = 0
+        self.literals = dict()
+        self.true = None
+
+    def variable(self, name):
+        """
+        Returns the variable of the symbol named `name`, creating it if new.
+        """
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+            self.names[self.count] = name
+        return self.variables[name]
+
+    def auxiliary(self):
+        """
+        Returns a fresh variable with no symbol attached.
+        """
+        self.count += 1
+        return self.count
+
+    def constant(self):
+        """
+        Returns a literal that is always true.
+        """
+        if self.true is None:
+            self.true = self.auxiliary()
+            self.clauses.append([self.true])
+        return self.true
+
+    def encode(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses that
+        define the auxiliary variables of its connectives. Equal
+        subsentences share one literal.
+        """
+        stack = [(sentence, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in self.literals:
+                continue
+            if isinstance(node, Symbol):
+                self.literals[node] = self.variable(node.name)
+                continue
+            children = self.children(node)
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children
+                             if child not in self.literals)
+                continue
+            operands = [self.literals[child] for child in children]
+            self.literals[node] = self.define(node, operands)
+        return self.literals[sentence]
+
+    @classmethod
+    def children(cls, sentence):
+        """
+        Returns the immediate subsentences of `sentence`.
+        """
+        if isinstance(sentence, Not):
+            return [sentence.operand]
+        elif isinstance(sentence, And):
+            return sentence.conjuncts
+        elif isinstance(sentence, Or):
+            return sentence.disjuncts
+        elif isinstance(sentence, Implication):
+            return [sentence.antecedent, sentence.consequent]
+        elif isinstance(sentence, Biconditional):
+            return [sentence.left, sentence.right]
+        raise TypeError(f"cannot encode {type(sentence).__name__}")
+
+    def define(self, sentence, operands):
+        """
+        Returns a literal equivalent to the connective of `sentence` applied
+        to the `operands` literals.
+        """
+        if isinstance(sentence, Not):
+            return -operands[0]
+        if isinstance(sentence, Implication):
+            sentence, operands = Or(), [-operands[0], operands[1]]
+        if isinstance(sentence, (And, Or)):
+            if len(operands) == 1:
+                return operands[0]
+            if not operands:
+                true = self.constant()
+                return true if isinstance(sentence, And) else -true
+            # An Or is an And of the negated operands, negated
+            sign = 1 if isinstance(sentence, And) else -1
+            a = self.auxiliary()
+            for literal in operands:
+                self.clauses.append([-a, sign * literal])
+            self.clauses.append([a] + [-sign * literal for literal in operands])
+            return sign * a
+
+        # Biconditional
+        a = self.auxiliary()
+        p, q = operands
+        self.clauses.extend([
+            [-a, -p, q], [-a, p, -q], [a, p, q], [a, -p, -q]
+        ])
+        return a
+
+    def add(self, sentence):
+        """
+        Adds clauses asserting that `sentence` is true. Top-level
+        conjunctions and disjunctions of literals become clauses directly.
+        """
+        stack = [sentence]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, And):
+                stack.extend(reversed(node.conjuncts))
+            elif isinstance(node, Or) and all(
+                isinstance(d, Symbol) or (isinstance(d, Not)
+                                          and isinstance(d.operand, Symbol))
+                for d in node.disjuncts
+            ):
+                self.clauses.append([self.encode(d) for d in node.disjuncts])
+            else:
+                self.clauses.append([self.encode(node)])
+
+
+class Solver():
+    """
+    CDCL SAT solver with two watched literals per clause, first-UIP clause
+    learning with non-chronological backtracking, activity-based branching,
+    phase saving and geometric restarts.
+
+    Clauses can be added between calls to `solve`, and learned clauses are
+    kept, so the solver can be used incrementally. `solve` accepts
+    assumptions: literals that hold for that call only.
+    """
+
+    def __init__(self, clauses=()):
+        self.values = dict()
+        self.levels = dict()
+        self.reasons = dict()
+        self.phases = dict()
+        self.activity = dict()
+        self.watches = dict()
+        self.clauses = []
+        self.learnts = []
+        self.max_learnts = 2000
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.order = []
+        self.increment = 1.0
+        self.unsat = False
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal):
+        """
+        Returns True or False for an assigned literal, None otherwise.
+        """
+        value = self.values.get(abs(literal))
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_variable(self, variable):
+        if variable not in self.activity:
+            self.activity[variable] = 0.0
+            self.watches[variable] = []
+            self.watches[-variable] = []
+            heapq.heappush(self.order, (0.0, variable))
+
+    def add_clause(self, clause):
+        """
+        Adds a clause (a list of literals). Returns False if the clauses are
+        now known to be unsatisfiable.
+        """
+        self.backtrack(0)
+        for literal in clause:
+            self.add_variable(abs(literal))
+        literals = []
+        for literal in dict.fromkeys(clause):
+            if -literal in literals or self.value(literal) is True:
+                return not self.unsat
+            if self.value(literal) is None:
+                literals.append(literal)
+        if not literals:
+            self.unsat = True
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            if self.propagate() is not None:
+                self.unsat = True
+        else:
+            self.clauses.append(literals)
+            self.watch(literals)
+        return not self.unsat
+
+    def watch(self, clause):
+        self.watches[-clause[0]].append(clause)
+        self.watches[-clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a falsified
+        clause on conflict, None otherwise.
+        """
+        values = self.values
+        while self.head < len(self.trail):
+            literal = self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+            false = -literal
+            watching = self.watches[literal]
+            kept = []
+            conflict = None
+            for k, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                value = values.get(abs(first))
+                if value is not None and value == (first > 0):
+                    kept.append(clause)
+                    continue
+                for k2 in range(2, len(clause)):
+                    other = clause[k2]
+                    value2 = values.get(abs(other))
+                    if value2 is None or value2 == (other > 0):
+                        clause[1], clause[k2] = other, false
+                        self.watches[-other].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value is None:
+                        self.assign(first, clause)
+                    else:
+                        conflict = clause
+                        kept.extend(watching[k + 1:])
+                        break
+            self.watches[literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learned clause, backtrack level) for a conflict, using the
+        first unique implication point. The learned clause's first literal
+        becomes true after backtracking.
+        """
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        index = len(self.trail) - 1
+        clause, implied = conflict, None
+        while True:
+            for literal in clause:
+                variable = abs(literal)
+                if literal == implied or variable in seen:
+                    continue
+                if self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(literal)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            implied = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(implied)]
+        learned[0] = -implied
+
+        backtrack = 0
+        if len(learned) > 1:
+            deepest = max(range(1, len(learned)),
+                          key=lambda k: self.levels[abs(learned[k])])
+            learned[1], learned[deepest] = learned[deepest], learned[1]
+            backtrack = self.levels[abs(learned[1])]
+        self.increment *= 1.05
+        return learned, backtrack
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+            self.increment *= 1e-100
+            self.order = [(-a, v) for v, a in self.activity.items()
+                          if v not in self.values]
+            heapq.heapify(self.order)
+        elif abs(variable) not in self.values:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above decision level `level`.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            del self.values[variable]
+            del self.reasons[variable]
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = min(self.head, start)
+
+    def reduce(self):
+        """
+        Forgets the longer half of the learned clauses. Only called at
+        decision level 0, where no learned clause is the reason of an
+        assignment that conflict analysis can reach.
+        """
+        self.learnts.sort(key=len)
+        keep = len(self.learnts) // 2
+        removed = {id(clause) for clause in self.learnts[keep:]
+                   if len(clause) > 2}
+        literals = {-clause[k] for clause in self.learnts[keep:]
+                    if id(clause) in removed for k in (0, 1)}
+        for literal in literals:
+            self.watches[literal] = [clause for clause in self.watches[literal]
+                                     if id(clause) not in removed]
+        self.learnts = [clause for clause in self.learnts
+                        if id(clause) not in removed]
+        self.max_learnts = int(self.max_learnts * 1.1)
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or None
+        if every variable is assigned.
+        """
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if variable not in self.values:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, together with the `assumptions`
+        literals, are satisfiable, storing a satisfying assignment in
+        `model` as a dict from variable to bool.
+        """
+        self.model = None
+        if self.unsat:
+            return False
+        self.backtrack(0)
+        for literal in assumptions:
+            self.add_variable(abs(literal))
+        restart = 100
+        since_restart = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    self.unsat = True
+                    return False
+                self.conflicts += 1
+                since_restart += 1
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learnts.append(learned)
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                continue
+
+            if since_restart >= restart:
+                since_restart = 0
+                restart = int(restart * 1.5)
+                self.backtrack(0)
+                if len(self.learnts) > self.max_learnts:
+                    self.reduce()
+                continue
+
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = dict(self.values)
+                self.backtrack(0)
+                return True
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            phase = self.phases.get(variable, False)
+            self.assign(variable if phase else -variable, None)
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that can be grown one sentence at a time and queried in
+    between, without starting over: sentences are encoded into a single
+    incremental solver, so its learned clauses and the literals it has
+    propagated are kept from one query to the next.
+
+    Queries can be asked under assumptions, sentences taken to be true for
+    that query only.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.sent = 0
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence known to be true.
+        """
+        self.cnf.add(sentence)
+        self.flush()
+
+    def flush(self):
+        """
+        Hands the clauses encoded since the last call to the solver.
+        """
+        for clause in self.cnf.clauses[self.sent:]:
+            self.solver.add_clause(clause)
+        self.sent = len(self.cnf.clauses)
+
+    def literals(self, sentences):
+        """
+        Returns a literal for each of `sentences`. Their Tseitin definitions
+        are added for good, as they only constrain new variables.
+        """
+        literals = [self.cnf.encode(sentence) for sentence in sentences]
+        self.flush()
+        return literals
+
+    def satisfiable(self, assumptions=()):
+        """
+        Returns True if the knowledge base is consistent with the
+        `assumptions` sentences.
+        """
+        return self.solver.solve(self.literals(assumptions))
+
+    def entails(self, query, assumptions=()):
+        """
+        Returns True if the knowledge base, together with the `assumptions`
+        sentences, entails `query`.
+        """
+        literals = self.literals(list(assumptions) + [query])
+        literals[-1] = -literals[-1]
+        return not self.solver.solve(literals)
+
+    def model(self, assumptions=()):
+        """
+        Returns a model of the knowledge base and `assumptions` as a dict
+        from symbol name to bool, or None if there is none.
+        """
+        if not self.satisfiable(assumptions):
+            return None
+        return {name: self.solver.model.get(variable, False)
+                for name, variable in self.cnf.variables.items()}
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of `sentence` as a dict from symbol name to bool, or
+    None if it is unsatisfiable. Symbols of the sentence left free by the
+    solver are reported as False.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.clauses)
+    if not solver.solve():
+        return None
+    return {name: solver.model.get(variable, False)
+            for name, variable in cnf.variables.items()}
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query, using the SAT solver."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf.clauses).solve()
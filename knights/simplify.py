@@ -0,0 +1,265 @@
+"""
+Simplification pass for logic.py knowledge bases.
+
+`simplify` rewrites a sentence into an equivalent, usually smaller one before
+it is handed to `model_check`:
+    - nested conjunctions and disjunctions are flattened, duplicates dropped
+      and absorbed operands removed (A ∨ (A ∧ B) is A)
+    - double negations cancel and constants are folded; the constants
+      themselves are And() (true) and Or() (false)
+    - top-level literals are facts: their symbols are fixed to the asserted
+      value and substituted into the conjuncts mentioning them, repeatedly,
+      until no new facts appear (unit propagation)
+"""
+from collections import deque
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol, model_check
+
+TRUE = And()
+FALSE = Or()
+
+
+def literal(sentence):
+    """
+    Returns (name, value) if `sentence` is a symbol or a negated symbol,
+    None otherwise.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.name, True
+    if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return sentence.operand.name, False
+    return None
+
+
+def negate(sentence):
+    """
+    Returns the negation of `sentence`, folding constants and double
+    negations.
+    """
+    if sentence is TRUE:
+        return FALSE
+    if sentence is FALSE:
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def children(sentence):
+    """
+    Returns the operands of a conjunction or disjunction.
+    """
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    return sentence.disjuncts
+
+
+def junction(cls, operands):
+    """
+    Returns the conjunction (cls And) or disjunction (cls Or) of `operands`
+    after flattening, folding constants, removing duplicates and absorbed
+    operands, and detecting complementary pairs.
+    """
+    unit, zero = (TRUE, FALSE) if cls is And else (FALSE, TRUE)
+    dual = Or if cls is And else And
+    flat = dict()
+    stack = list(reversed(operands))
+    while stack:
+        operand = stack.pop()
+        if operand is unit:
+            continue
+        if operand is zero:
+            return zero
+        if isinstance(operand, cls):
+            stack.extend(reversed(children(operand)))
+            continue
+        flat[operand] = None
+    for operand in flat:
+        if negate(operand) in flat:
+            return zero
+
+    # X ∧ (X ∨ Y) is X, and X ∨ (X ∧ Y) is X
+    kept = [operand for operand in flat
+            if not (isinstance(operand, dual) and
+                    any(inner in flat for inner in children(operand)))]
+    if not kept:
+        return unit
+    if len(kept) == 1:
+        return kept[0]
+    return cls(*kept)
+
+
+def rewrite(sentence, facts, memo):
+    """
+    Returns `sentence` simplified, with the symbols in `facts` replaced by
+    their values. Nodes are rewritten children first from an explicit
+    stack, so sentences nest as deeply as they like, and `memo` keeps the
+    result of every node rewritten.
+    """
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in memo:
+            continue
+        if not isinstance(node, (Symbol, Not, And, Or, Implication,
+                                 Biconditional)):
+            raise TypeError(f"cannot simplify {type(node).__name__}")
+        children = node.subsentences()
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children
+                         if child not in memo)
+            continue
+        memo[node] = rebuild(node, [memo[child] for child in children],
+                             facts)
+    return memo[sentence]
+
+
+def rebuild(sentence, operands, facts):
+    """
+    Returns `sentence` simplified, given its subsentences already
+    simplified in `operands`, with the symbols in `facts` replaced by their
+    values.
+    """
+    if isinstance(sentence, Symbol):
+        if sentence.name in facts:
+            return TRUE if facts[sentence.name] else FALSE
+        return sentence
+    if isinstance(sentence, Not):
+        return negate(operands[0])
+    if isinstance(sentence, (And, Or)):
+        return junction(type(sentence), operands)
+    if isinstance(sentence, Implication):
+        return junction(Or, [negate(operands[0]), operands[1]])
+    left, right = operands
+    if left is right:
+        return TRUE
+    if left is negate(right):
+        return FALSE
+    if left in (TRUE, FALSE):
+        return right if left is TRUE else negate(right)
+    if right in (TRUE, FALSE):
+        return left if right is TRUE else negate(left)
+    return Biconditional(left, right)
+
+
+def top_conjuncts(sentence):
+    """
+    Returns the conjuncts of `sentence`, or just `sentence` if it isn't a
+    conjunction.
+    """
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    return (sentence,)
+
+
+def size(sentence):
+    """
+    Returns the number of distinct nodes in `sentence`.
+    """
+    seen = set()
+    stack = [sentence]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        if isinstance(node, Not):
+            stack.append(node.operand)
+        elif isinstance(node, (And, Or)):
+            stack.extend(children(node))
+        elif isinstance(node, Implication):
+            stack.extend([node.antecedent, node.consequent])
+        elif isinstance(node, Biconditional):
+            stack.extend([node.left, node.right])
+    return len(seen)
+
+
+def simplify(knowledge, facts=None):
+    """
+    Returns (sentence, facts, stats) where `sentence` together with the
+    `facts` assignment (a dict from symbol name to bool, extending the one
+    passed in) is equivalent to `knowledge`, and `stats` reports how much
+    smaller the knowledge base got. `sentence` is FALSE if the knowledge
+    base is contradictory.
+
+    The sentence is rewritten once in full. Its conjuncts are then indexed
+    by the symbols they mention, and each new fact sends only the conjuncts
+    mentioning its symbol back to be rewritten, from a worklist, so unit
+    propagation doesn't rescan the whole sentence however many rounds of
+    facts it takes.
+    """
+    facts = dict(facts or {})
+    sentence = rewrite(knowledge, facts, dict())
+
+    # Conjuncts left (None once rewritten), and the positions of the ones
+    # mentioning each symbol
+    conjuncts = []
+    occurrences = dict()
+    pending = deque()
+    queued = set()
+
+    def queue(k):
+        if conjuncts[k] is not None and k not in queued:
+            queued.add(k)
+            pending.append(k)
+
+    def add(conjunct):
+        fact = literal(conjunct)
+        if fact is None:
+            k = len(conjuncts)
+            conjuncts.append(conjunct)
+            for name in conjunct.symbols():
+                occurrences.setdefault(name, []).append(k)
+
+            # A fact split off the same rewrite may already mention it
+            if not facts.keys().isdisjoint(conjunct.symbols()):
+                queue(k)
+            return
+        facts[fact[0]] = fact[1]
+        for k in occurrences.pop(fact[0], ()):
+            queue(k)
+
+    rewrites = 0
+    if sentence is not FALSE:
+        for conjunct in top_conjuncts(sentence):
+            add(conjunct)
+    while pending and sentence is not FALSE:
+        k = pending.popleft()
+        queued.discard(k)
+        rewrites += 1
+        result = rewrite(conjuncts[k], facts, dict())
+        conjuncts[k] = None
+        if result is FALSE:
+            sentence = FALSE
+            break
+        for conjunct in top_conjuncts(result):
+            add(conjunct)
+    if sentence is not FALSE:
+        sentence = junction(And, [conjunct for conjunct in conjuncts
+                                  if conjunct is not None])
+
+    before = knowledge.symbols()
+    after = sentence.symbols()
+    stats = {
+        "conjuncts_rewritten": rewrites,
+        "nodes_before": size(knowledge),
+        "nodes_after": size(sentence),
+        "symbols_before": len(before),
+        "symbols_after": len(after),
+        "symbols_fixed": len(facts.keys() & before),
+        "symbols_eliminated": len(before - after),
+    }
+    return sentence, facts, stats
+
+
+def model_check_simplified(knowledge, query):
+    """Checks if knowledge base entails query, simplifying both first so
+    model_check enumerates only the symbols left undetermined."""
+    knowledge, facts, _ = simplify(knowledge)
+    if knowledge is FALSE:
+        return True
+    query = rewrite(query, facts, dict())
+    if query in (TRUE, FALSE):
+        return query is TRUE or model_check(knowledge, FALSE)
+    return model_check(knowledge, query)
@@ -0,0 +1,82 @@
+"""
+Compares the memory and marking cost of set-based and bitmask sentences.
+
+Usage: python benchmark.py [sentences] [size]
+
+Builds `sentences` (default 100000) sentences over the neighbors of random
+cells of a `size` x `size` board (default 1000), once with the cells kept in
+a set, the way Sentence used to store them, and once with the bitmask
+Sentence. Reports the memory each sentence takes, as traced by tracemalloc,
+and the time to mark one of its cells as safe. A sentence over cells in
+opposite corners of the board is measured too, since its mask spans the
+whole board.
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from minesweeper import Sentence, neighbors
+
+
+class SetSentence():
+    """
+    Sentence keeping its cells in a set, rebuilt on every mark.
+    """
+
+    def __init__(self, cells, count):
+        self.cells = set(cells)
+        self.count = count
+
+    def mark_safe(self, cell):
+        if cell in self.cells:
+            self.cells = {x for x in self.cells if x != cell}
+
+
+def build(kind, cell_lists):
+    """
+    Returns the sentences of `kind` over `cell_lists` and the bytes each
+    takes on average.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sentences = [kind(cells, 1) for cells in cell_lists]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return sentences, used / len(sentences)
+
+
+def measure(name, kind, cell_lists):
+    sentences, size = build(kind, cell_lists)
+    began = time.perf_counter()
+    for sentence, cells in zip(sentences, cell_lists):
+        sentence.mark_safe(cells[0])
+    elapsed = time.perf_counter() - began
+    print(f"{name:>7}: {size:.0f} B per sentence, "
+          f"{1e6 * elapsed / len(sentences):.2f} us per mark")
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    random.seed(0)
+    cell_lists = [
+        neighbors((random.randrange(size), random.randrange(size)),
+                  size, size)
+        for _ in range(count)
+    ]
+
+    print(f"{count} neighborhood sentences on a {size}x{size} board")
+    large = measure("set", SetSentence, cell_lists)
+    small = measure("bitmask", Sentence, cell_lists)
+    print(f"  saving: {large / small:.1f}x")
+
+    corners = [[(0, 0), (size - 1, size - 1)]]
+    print(f"Sentence over opposite corners of a {size}x{size} board")
+    measure("set", SetSentence, corners)
+    measure("bitmask", Sentence, corners)
+
+
+if __name__ == "__main__":
+    main()
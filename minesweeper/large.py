@@ -0,0 +1,85 @@
+"""
+Array-backed Minesweeper board for very large games.
+
+LargeMinesweeper plays exactly like Minesweeper, but keeps the board in a
+NumPy boolean array instead of nested lists, so boards of millions of cells
+take a couple of bytes per cell:
+    - mines are placed by sampling cell indices without replacement, with
+      no retries however dense the board is
+    - the number of nearby mines of every cell is computed once, by adding
+      the eight shifted slices of the zero-padded board, so nearby_mines is
+      a single array lookup
+    - the set of mine coordinates the base class exposes as `mines` is only
+      built when something asks for it
+"""
+import random
+
+import numpy as np
+
+from minesweeper import Minesweeper
+
+
+class LargeMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+        if not 0 <= mines <= height * width:
+            raise ValueError(f"cannot place {mines} mines on a "
+                             f"{height}x{width} board")
+
+        self.height = height
+        self.width = width
+        self.mine_count = mines
+        self._mines = None
+
+        # Draw the seed from `random` by default, so random.seed() still
+        # makes games reproducible
+        if seed is None:
+            seed = random.getrandbits(64)
+        rng = np.random.default_rng(seed)
+
+        # Add mines at distinct random positions
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[rng.choice(height * width, mines, replace=False)] = True
+
+        # Count the mines around every cell at once
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @property
+    def mines(self):
+        """
+        Set of the (i, j) cells holding mines, built on first use.
+        """
+        if self._mines is None:
+            self._mines = set(map(tuple, np.argwhere(self.board).tolist()))
+        return self._mines
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
+
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return (len(self.mines_found) == self.mine_count and
+                all(self.board[i, j] for i, j in self.mines_found))
@@ -1,5 +1,23 @@
+import functools
 import itertools
+import math
 import random
+import time
+from collections import deque
+
+
+def neighbors(cell, height, width):
+    """
+    Returns the cells of a height x width board within one row and column
+    of `cell`, not including the cell itself.
+    """
+    i, j = cell
+    return [
+        (x, y)
+        for x in range(max(i - 1, 0), min(i + 2, height))
+        for y in range(max(j - 1, 0), min(j + 2, width))
+        if (x, y) != (i, j)
+    ]
 
 
 class Minesweeper():
@@ -63,17 +81,11 @@ class Minesweeper():
         count = 0
 
         # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+        for i, j in neighbors(cell, self.height, self.width):
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+            # Update count if cell is mine
+            if self.board[i][j]:
+                count += 1
 
         return count
 
@@ -84,29 +96,141 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+# Widest mask whose offsets are cached
+CACHED_MASK_BITS = 64
+
+
+@functools.lru_cache(maxsize=4096)
+def offsets(span, mask):
+    """
+    Returns the (row, column) offsets of the bits set in `mask`, for rows
+    `span` bits wide.
+    """
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(divmod(low.bit_length() - 1, span))
+        mask ^= low
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=4096)
+def column_mask(span, rows):
+    """
+    Returns the mask of the first column of `rows` rows `span` bits wide.
+    """
+    return sum(1 << (r * span) for r in range(rows))
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are stored compactly as a bitmask over the smallest rectangle
+    holding them: bit (i - top) * span + (j - left) stands for cell (i, j),
+    where (top, left) is the rectangle's corner and span its width. A
+    sentence from a revealed cell fits in 3x3, so its mask has 9 bits.
+
+    The AI only builds sentences out of one cell's neighbors, but a sentence
+    whose cells are far apart, such as a remaining-mines constraint over the
+    whole board, has a rectangle as large as their spread: its mask takes
+    height x width bits, and marking one of its cells takes time in
+    proportion. Masks wider than CACHED_MASK_BITS are decoded without going
+    through the offsets cache, so such sentences don't pile up there.
     """
 
+    __slots__ = ("top", "left", "span", "mask", "count")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
         self.count = count
+        cells = list(cells)
+        if not cells:
+            self.top, self.left, self.span, self.mask = 0, 0, 1, 0
+            return
+        columns = [j for i, j in cells]
+        self.top = min(i for i, j in cells)
+        self.left = min(columns)
+        self.span = max(columns) - self.left + 1
+        self.mask = 0
+        for i, j in cells:
+            self.mask |= 1 << ((i - self.top) * self.span + j - self.left)
+
+    @property
+    def cells(self):
+        """
+        Set of the cells in the sentence.
+        """
+        top, left = self.top, self.left
+        decode = offsets
+        if self.mask.bit_length() > CACHED_MASK_BITS:
+            decode = offsets.__wrapped__
+        return {(top + i, left + j) for i, j in decode(self.span, self.mask)}
 
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.key() == other.key()
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Returns a hashable snapshot of the sentence, equal for equal sentences.
+        """
+        return (self.top, self.left, self.span, self.mask, self.count)
+
+    def bit(self, cell):
+        """
+        Returns the bit standing for `cell`, or 0 if it is outside the
+        sentence's rectangle.
+        """
+        i = cell[0] - self.top
+        j = cell[1] - self.left
+        if i < 0 or not 0 <= j < self.span:
+            return 0
+        return 1 << (i * self.span + j)
+
+    def remove(self, bit):
+        """
+        Removes the cell standing for `bit`, shrinking the rectangle to the
+        cells left so that equal sentences keep equal keys.
+        """
+        mask = self.mask & ~bit
+        span = self.span
+        if not mask:
+            self.top, self.left, self.span, self.mask = 0, 0, 1, 0
+            return
+
+        # Drop empty rows from the top, then empty columns from both sides
+        row = (1 << span) - 1
+        while not mask & row:
+            mask >>= span
+            self.top += 1
+        column = column_mask(span, -(-mask.bit_length() // span))
+        left = 0
+        while not mask & (column << left):
+            left += 1
+        right = 0
+        while not mask & (column << (span - 1 - right)):
+            right += 1
+        if left or right:
+            width = span - left - right
+            row = (1 << width) - 1
+            packed = 0
+            for r in range(-(-mask.bit_length() // span)):
+                packed |= ((mask >> (r * span + left)) & row) << (r * width)
+            mask = packed
+            self.left += left
+            self.span = width
+        self.mask = mask
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
         mines = set()
-        if len( self.cells ) == self.count:
+        if bin( self.mask ).count("1") == self.count:
             mines = self.cells
             
         return(mines)
@@ -129,14 +253,9 @@ class Sentence():
         a cell is known to be a mine.
         """
         #If the cell to mark is in the sentence, remove it. And since it's a mine, the count goes down by one
-        if cell in self.cells:
-            new_cells = set()
-            for x in self.cells:
-                 if x == cell:
-                     continue
-                 new_cells.add(x)
-    
-            self.cells = new_cells
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.remove(bit)
             self.count = self.count - 1
     
     def mark_safe(self, cell):
@@ -145,14 +264,386 @@ class Sentence():
         a cell is known to be safe.
         """
         #If the cell to mark is in the sentence, remove it. And since it's a safe, the count stays the same.
-        if cell in self.cells:
-            new_cells = set()
-            for x in self.cells:
-                  if x == cell:
-                      continue
-                  new_cells.add(x)
-            
-            self.cells = new_cells
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.remove(bit)
+
+
+class KnowledgeBase():
+    """
+    Set of sentences known to be true, indexed by cell so that the sentences
+    sharing a cell with a given one are found without scanning all of them.
+    Sentences are stored under their key(), so duplicates are dropped, and
+    sentences left with no cells are discarded.
+    """
+
+    def __init__(self):
+        self.sentences = dict()
+        self.index = dict()
+
+    def __iter__(self):
+        return iter(list(self.sentences.values()))
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __contains__(self, sentence):
+        return sentence.key() in self.sentences
+
+    def add(self, sentence):
+        """
+        Adds a sentence. Returns True if it was new.
+        """
+        key = sentence.key()
+        if not sentence.mask or key in self.sentences:
+            return False
+        self.sentences[key] = sentence
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(key)
+        return True
+
+    def remove(self, sentence):
+        key = sentence.key()
+        del self.sentences[key]
+        for cell in sentence.cells:
+            keys = self.index.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[cell]
+
+    def related(self, sentence):
+        """
+        Returns the other sentences sharing at least one cell with `sentence`.
+        """
+        keys = set()
+        for cell in sentence.cells:
+            keys.update(self.index.get(cell, ()))
+        keys.discard(sentence.key())
+        return [self.sentences[key] for key in keys]
+
+    def connected(self, cells):
+        """
+        Returns the sentences linked to any of `cells` through a chain of
+        sentences sharing cells.
+        """
+        keys = set()
+        seen = set()
+        stack = [cell for cell in cells if cell in self.index]
+        while stack:
+            cell = stack.pop()
+            if cell in seen:
+                continue
+            seen.add(cell)
+            for key in self.index.get(cell, ()):
+                if key not in keys:
+                    keys.add(key)
+                    stack.extend(self.sentences[key].cells - seen)
+        return [self.sentences[key] for key in keys]
+
+    def mark(self, cell, mine):
+        """
+        Updates the sentences containing `cell` given that it is a mine
+        (`mine` True) or safe, re-indexing them. Returns the sentences that
+        changed and are still in the knowledge base.
+        """
+        changed = []
+        for key in list(self.index.pop(cell, ())):
+            sentence = self.sentences.pop(key, None)
+            if sentence is None:
+                continue
+            if mine:
+                sentence.mark_mine(cell)
+            else:
+                sentence.mark_safe(cell)
+
+            # Move the sentence to its new key, or drop it if it is empty or
+            # now equal to another one
+            new_key = sentence.key()
+            keep = sentence.mask and new_key not in self.sentences
+            if keep:
+                self.sentences[new_key] = sentence
+                changed.append(sentence)
+            for other in sentence.cells:
+                keys = self.index[other]
+                keys.discard(key)
+                if keep:
+                    keys.add(new_key)
+                elif not keys:
+                    del self.index[other]
+        return changed
+
+
+class Timeout(Exception):
+    """Raised when counting configurations runs out of time."""
+
+
+def frontier_components(sentences):
+    """
+    Splits sentences into groups that share no cells, returning a list of
+    (cells, sentences) pairs. Within each group the cells are ordered so
+    that cells of the same sentence tend to be close together.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent.setdefault(cell, cell) != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for sentence in sentences:
+        cells = list(sentence.cells)
+        for cell in cells[1:]:
+            parent[find(cell)] = find(cells[0])
+
+    groups = dict()
+    for sentence in sentences:
+        groups.setdefault(find(next(iter(sentence.cells))), []).append(sentence)
+
+    components = []
+    for group in groups.values():
+        cells = []
+        seen = set()
+        for sentence in sorted(group, key=lambda s: min(s.cells)):
+            for cell in sorted(sentence.cells - seen):
+                seen.add(cell)
+                cells.append(cell)
+        components.append((cells, group))
+    return components
+
+
+def count_configurations(cells, sentences, deadline=None):
+    """
+    Counts the mine configurations of `cells` consistent with every
+    sentence, grouped by number of mines. Returns a dict mapping a number
+    of mines k to (configurations, per-cell counts), where per-cell counts
+    lists, for each cell, in how many of those configurations it is a mine.
+
+    Cells are assigned in order by backtracking. Once a sentence's last cell
+    is assigned its count must be met, so the search below a cell only
+    depends on the remaining counts of the sentences still open there,
+    which is what results are memoized on. Raises Timeout after `deadline`.
+    """
+    n = len(cells)
+    position = {cell: k for k, cell in enumerate(cells)}
+    counts = [sentence.count for sentence in sentences]
+
+    def check(step):
+        if (deadline is not None and not step % 256 and
+                time.perf_counter() > deadline):
+            raise Timeout
+
+    # The sentences each cell is in, along with how many of their cells
+    # come after it, and where each sentence starts and ends. Setup takes
+    # time in proportion to the sentences' sizes, and checks the deadline
+    # as it goes too
+    members = [[] for k in range(n)]
+    after = [[] for k in range(n)]
+    starts = [[] for k in range(n + 1)]
+    ends = [[] for k in range(n + 1)]
+    for s, sentence in enumerate(sentences):
+        check(s)
+        spots = sorted(position[cell] for cell in sentence.cells)
+        for c, k in enumerate(spots):
+            members[k].append(s)
+            after[k].append(len(spots) - c - 1)
+        if spots[0] < spots[-1]:
+            starts[spots[0] + 1].append(s)
+            ends[spots[-1] + 1].append(s)
+
+    # Sentences open at position k: started before k and ending at or after k
+    open_at = []
+    open_now = dict()
+    for k in range(n + 1):
+        check(k)
+        for s in ends[k]:
+            del open_now[s]
+        for s in starts[k]:
+            open_now[s] = None
+        open_at.append(tuple(open_now))
+
+    # Depth-first search over the positions, with an explicit stack of
+    # [position, memo key, mine value being tried, result so far] frames,
+    # so components of any size are counted without recursing
+    memo = dict()
+    nodes = 0
+    remaining = list(counts)
+    stack = []
+    k = 0
+    while True:
+        if k == n:
+            value = {0: (1, [])}
+        else:
+            key = (k, tuple(remaining[s] for s in open_at[k]))
+            value = memo.get(key)
+            if value is None:
+                nodes += 1
+                if deadline is not None and not nodes % 256:
+                    if time.perf_counter() > deadline:
+                        raise Timeout
+                stack.append([k, key, -1, dict()])
+
+        # Fold finished results into the frames waiting for them, until one
+        # has a value left to try for its cell
+        while stack:
+            frame = stack[-1]
+            k, key, mine, result = frame
+            if value is not None:
+                for mines, (ways, per_cell) in value.items():
+                    total, cell_counts = result.get(mines + mine, (0, None))
+                    if cell_counts is None:
+                        cell_counts = [0] * (n - k)
+                    cell_counts[0] += ways * mine
+                    for c, count in enumerate(per_cell):
+                        cell_counts[c + 1] += count
+                    result[mines + mine] = (total + ways, cell_counts)
+                for s in members[k]:
+                    remaining[s] += mine
+                value = None
+
+            mine += 1
+            while mine <= 1 and not all(
+                    0 <= remaining[s] - mine <= later
+                    for s, later in zip(members[k], after[k])):
+                mine += 1
+            if mine <= 1:
+                frame[2] = mine
+                for s in members[k]:
+                    remaining[s] -= mine
+                k += 1
+                break
+            stack.pop()
+            memo[key] = result
+            value = result
+        else:
+            return value
+
+
+def linear_deductions(cells, sentences):
+    """
+    Returns (safes, mines) deduced from `sentences` (over `cells`) taken
+    together as a system of linear equations over 0/1 variables.
+
+    The system is brought to reduced row echelon form with fraction-free
+    integer elimination (rows are scaled rather than divided, then reduced
+    by the gcd of their entries). Every row, original or reduced, says
+    sum(a * x) = b; since each x is 0 or 1 its left side lies between the
+    sum of the negative and of the positive coefficients, and any x whose
+    value would push the sum past those bounds is fixed to the other one.
+    """
+    position = {cell: k for k, cell in enumerate(cells)}
+    n = len(cells)
+    rows = []
+    for sentence in sentences:
+        row = [0] * (n + 1)
+        for cell in sentence.cells:
+            row[position[cell]] = 1
+        row[n] = sentence.count
+        rows.append(row)
+    original = [list(row) for row in rows]
+
+    # Fraction-free Gauss-Jordan elimination
+    pivot_row = 0
+    for column in range(n):
+        pivot = next((r for r in range(pivot_row, len(rows))
+                      if rows[r][column]), None)
+        if pivot is None:
+            continue
+        rows[pivot_row], rows[pivot] = rows[pivot], rows[pivot_row]
+        p = rows[pivot_row]
+        for r in range(len(rows)):
+            b = rows[r][column]
+            if r == pivot_row or not b:
+                continue
+            a = p[column]
+            row = [a * x - b * y for x, y in zip(rows[r], p)]
+            divisor = 0
+            for x in row:
+                divisor = math.gcd(divisor, x)
+            if divisor > 1:
+                row = [x // divisor for x in row]
+            rows[r] = row
+        pivot_row += 1
+        if pivot_row == len(rows):
+            break
+
+    safes = set()
+    mines = set()
+    for row in original + rows[:pivot_row]:
+        b = row[n]
+        low = sum(a for a in row[:n] if a < 0)
+        high = sum(a for a in row[:n] if a > 0)
+        for k in range(n):
+            a = row[k]
+            if not a:
+                continue
+            # Setting x to 1 moves the sum's bound by a; if that bound can
+            # no longer reach b, x must be 0 (and likewise the other way)
+            if (low + a > b) if a > 0 else (high + a < b):
+                safes.add(cells[k])
+            elif (high - a < b) if a > 0 else (low - a > b):
+                mines.add(cells[k])
+    return safes, mines
+
+
+class CellPool():
+    """
+    Set of the cells of a height x width board that cells are only ever
+    removed from. Cell (i, j) is numbered i * width + j, and the pool holds
+    the cells at positions below its size. Every number starts at its own
+    position, and removing a cell swaps it with the last cell in the pool,
+    so only the positions a removal moved are stored: the pool starts full
+    at no cost, and removals take O(1).
+    """
+
+    def __init__(self, height, width):
+        self.width = width
+        self.size = height * width
+        self.position = dict()
+        self.number = dict()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        number = cell[0] * self.width + cell[1]
+        return self.position.get(number, number) < self.size
+
+    def discard(self, cell):
+        number = cell[0] * self.width + cell[1]
+        k = self.position.get(number, number)
+        if k >= self.size:
+            return
+        self.size -= 1
+        last = self.number.get(self.size, self.size)
+        self.number[k], self.position[last] = last, k
+        self.number[self.size], self.position[number] = number, self.size
+
+    def cell(self, k):
+        """
+        Returns the cell at position `k`.
+        """
+        return divmod(self.number.get(k, k), self.width)
+
+    def sample(self, exclude):
+        """
+        Returns a random cell of the pool not in `exclude`, or None if there
+        is none. Cells are drawn until one isn't excluded, which takes O(1)
+        while most of the pool isn't; if a few draws miss, the pool is
+        scanned instead.
+        """
+        for _ in range(16):
+            if not self.size:
+                return None
+            cell = self.cell(random.randrange(self.size))
+            if cell not in exclude:
+                return cell
+        for k in range(self.size):
+            cell = self.cell(k)
+            if cell not in exclude:
+                return cell
+        return None
 
 
 class MinesweeperAI():
@@ -160,12 +651,24 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, time_limit=1.0,
+                 inference="subset"):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, and the time allowed
+        # for working out mine probabilities when no safe move is left
+        self.total_mines = mines
+        self.time_limit = time_limit
+
+        # How sentences are combined: "subset" compares them pairwise,
+        # "linear" solves them together as a system of equations
+        if inference not in ("subset", "linear"):
+            raise ValueError(f"unknown inference {inference!r}")
+        self.inference = inference
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -173,26 +676,34 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells known to be neither safe nor mines
+        self.unknown = CellPool(height, width)
+
+        # Sentences about the game known to be true
+        self.knowledge = KnowledgeBase()
+
+        # Work done by the last call to add_knowledge
+        self.stats = dict()
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
+        Returns the sentences that changed.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unknown.discard(cell)
+        return self.knowledge.mark(cell, mine=True)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
+        Returns the sentences that changed.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.unknown.discard(cell)
+        return self.knowledge.mark(cell, mine=False)
 
     def add_knowledge(self, cell, count):
         """
@@ -209,116 +720,95 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
+        self.stats = {
+            "sentences_examined": 0,
+            "subset_checks": 0,
+            "sentences_inferred": 0,
+            "cells_marked": 0,
+            "eliminations": 0,
+        }
         self.moves_made.add(cell) #Number 1
-        self.mark_safe(cell)      #Number 2
+        #Number 2. Sentences are only looked at again when something about them changes, so the ones that changed go into a
+        #worklist, which drives the inference below.
+        pending = deque(self.mark_safe(cell))
         
-        #In order to update knowledge, we need the surrounding cells. Let's
-        #check if our selected cell is a border or a corner.
-        ci = cell[0]
-        cf = cell[1]
-        adyacent = set()
-        
-        #Corner check
-        if   ci == 0 and cf == 0:                           #Top-left corner
-            adyacent = {(0,1), (1,0), (1,1)}
-        elif ci == 0 and cf == (self.width - 1):            #Top-right corner
-            adyacent = {(0,self.width - 2), (1,self.width - 2), (1,self.width - 1)}       
-        elif ci == (self.height - 1) and cf == 0:           #Bottom-left corner
-            adyacent = {(self.height-2,0), (self.height-2,1), (self.height-1,1)}
-        elif ci == (self.height-1) and cf == (self.width-1): #Bottom-right corner
-            adyacent = {(self.height-1,self.width-2), (self.height-2,self.width-2), (self.height-2,self.width-1)}
-        
-        #Border but not corner check (If its a corner, these statements are not evaluated)
-        elif ci == 0:                                       #Top border
-            for i in range(2):
-                for j in range(cf-1, cf+2):
-                    if (i,j) == cell:                      
-                        continue
-                    adyacent.add((i,j))
-        elif ci == (self.height-1):                         #Bottom border
-            for i in range(self.height-2, self.height):
-                for j in range(cf-1,cf+2):
-                    if (i,j) == cell:                       
-                        continue
-                    adyacent.add((i,j))
-        elif cf == 0:                                       #Left border
-            for i in range(ci-1, ci+2):
-                for j in range(2):
-                    if (i,j) == cell:                       
-                        continue
-                    adyacent.add((i,j))
-        elif cf == (self.width-1):                         #Right border
-            for i in range(ci-1, ci+2):
-                for j in range(self.width-2,self.width):
-                    if (i,j) == cell:                       
-                        continue
-                    adyacent.add((i,j))
-        else:    #In any other case, the cell is not in a border or a corner,thus we have no restriction for adyacent cells.
-            for i in range(ci-1,ci+2):
-                for j in range(cf-1,cf+2):
-                    if (i,j) == cell:
-                        continue
-                    adyacent.add((i,j))
-        
-       # After getting the adyacent tiles, we just add them to the knowledge base as a Sentence     
-        self.knowledge.append( Sentence(adyacent, count) ) #Number 3
-       # In order to update the new sentences with the known safes and mines, we mark them again
-        for safe in self.safes:
-            self.mark_safe(safe)
-        for mine in self.mines:
-            self.mark_mine(mine)
-        
-        
-        #Number 4 and 5 - the while loop is to make sure all possible inferences are made
-        # To avoid missing information that could be vital. The inference and marking process
-        # must be done until no more info can be gathered
-        while True:
-            added_sentences = 0
-            safes_marked = 0
-            mines_marked = 0
-            
-            #Inferring new sentences using the existing ones. If they're the same sentence, it's skipped, otherwise we check if one
-            #is subset of the other one, if it is, we inferre, otherwise, we do nothing.
-            for sentence1 in self.knowledge:
-                for sentence2 in self.knowledge:
-                    if sentence1 == sentence2:
-                        continue
-                    elif sentence1.cells.issubset(sentence2.cells):
-                        new_cells = sentence2.cells - sentence1.cells
-                        new_count = sentence2.count - sentence1.count
-                        new_sentence = Sentence( new_cells, new_count )
-                        if new_sentence not in self.knowledge and new_cells != set():   
-                            self.knowledge.append( new_sentence )
-                            added_sentences += 1     
-            
-            #We check if our new sentences can help us find new safes. If we find any, we mark them.
-            for sentence in self.knowledge:        
-                if sentence.count == 0 and sentence.cells != set():
-                    for x in sentence.cells:
-                       if x not in self.safes:
-                            self.mark_safe(x)  
-                            safes_marked += 1
-
-            #We check if our new sentences can help us find new mines. If we find any, we mark them.                
-            for sentence in self.knowledge:                 
-                if len(sentence.cells) == sentence.count and sentence.cells != set():
-                    #for i in self.knowledge:
-                    #    print(i)
-                    for x in sentence.cells:
-                        if x not in self.mines:
-                            self.mark_mine(x)      
-                            mines_marked += 1
-            
-            #Clean empty sets if there's any, so the knowledge base doesn't grow too much, since it would make the algorithm slow.
-            for sentence in self.knowledge:
-                if sentence == Sentence(set(),0):
-                    self.knowledge.remove(sentence)
-
-            #If no more inferences are made, as well as no new safe/mine markings, we have gathered all the information we could, so
-            #we break the cicle. It can't iterate indefinitely, since the information we can gather is finite.    
-            if added_sentences + safes_marked + mines_marked == 0:
-                break
+        #In order to update knowledge, we need the surrounding cells. The neighbors function already leaves out the cells
+        #past the borders and corners.
+        adyacent = set(neighbors(cell, self.height, self.width))
         
+       # After getting the adyacent tiles, we add them to the knowledge base as a Sentence. Cells already known to be safe or
+       # mines are left out of it (taking the known mines out of the count too), so the rest of the knowledge stays as it is.
+        known_mines = adyacent & self.mines
+        new_sentence = Sentence(adyacent - self.safes - self.mines, count - len(known_mines))
+        if self.knowledge.add( new_sentence ): #Number 3
+            pending.append(new_sentence)
+
+        #Number 4 and 5 - we take sentences off the worklist until it's empty. A sentence that tells us new safes or mines gets
+        #them marked, which changes the sentences sharing those cells, so those go back on the worklist. Otherwise, it's
+        #compared with the sentences it shares cells with, and any sentence inferred from a subset goes on the worklist too.
+        #It can't run indefinitely, since the information we can gather is finite.
+        #With linear inference, the subset comparisons are skipped; once the worklist is empty, the sentences connected to
+        #anything that changed are solved together instead, and the cells that deduces are marked, starting over.
+        touched = set(adyacent)
+        while pending or touched:
+            if not pending:
+                pending.extend(self.solve_linear(touched))
+                touched = set()
+                continue
+            sentence = pending.popleft()
+            if sentence not in self.knowledge:
+                continue
+            self.stats["sentences_examined"] += 1
+            cells = sentence.cells
+            touched.update(cells)
+
+            safes = sentence.known_safes() - self.safes
+            mines = sentence.known_mines() - self.mines
+            for x in safes:
+                pending.extend(self.mark_safe(x))
+            for x in mines:
+                pending.extend(self.mark_mine(x))
+            self.stats["cells_marked"] += len(safes) + len(mines)
+            if safes or mines or self.inference != "subset":
+                continue
+
+            for other in self.knowledge.related(sentence):
+                self.stats["subset_checks"] += 1
+                other_cells = other.cells
+                if other_cells < cells:
+                    new_sentence = Sentence( cells - other_cells, sentence.count - other.count )
+                elif cells < other_cells:
+                    new_sentence = Sentence( other_cells - cells, other.count - sentence.count )
+                else:
+                    continue
+                if self.knowledge.add( new_sentence ):
+                    pending.append(new_sentence)
+                    self.stats["sentences_inferred"] += 1
+
+
+    def solve_linear(self, cells):
+        """
+        Marks the cells deduced by solving the sentences connected to
+        `cells` as systems of linear equations, one per independent group.
+        Returns the sentences that changed.
+        """
+        changed = []
+        if self.inference != "linear":
+            return changed
+        for group_cells, sentences in frontier_components(
+                self.knowledge.connected(cells)):
+            if len(sentences) < 2:
+                continue
+            self.stats["eliminations"] += 1
+            safes, mines = linear_deductions(group_cells, sentences)
+            safes -= self.safes
+            mines -= self.mines
+            for x in safes:
+                changed.extend(self.mark_safe(x))
+            for x in mines:
+                changed.extend(self.mark_mine(x))
+            self.stats["cells_marked"] += len(safes) + len(mines)
+        return changed
 
     def make_safe_move(self):
         """
@@ -346,22 +836,139 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Chooses among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        the one least likely to be a mine, given everything the AI knows.
         """
-        #We fill a set with all cells that are known NOT to be mines AND all the cells that haven't been clicked.
-        possible_moves = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i,j) not in self.moves_made and (i,j) not in self.mines:
-                    possible_moves.add((i,j))
-        
         #If all possible cells are either mines or have been clicked, we have reached our goal, thus we return None and let runner.py
         #handle the rest.
-        if possible_moves == set():
+        probabilities = self.mine_probabilities()
+        if not probabilities:
             return(None)
-        
-        #Otherwise, we take a random cell of the possible set.
-        move = possible_moves.pop()
+
+        #Otherwise, we take the safest guess.
+        move = min(probabilities, key=lambda cell: (probabilities[cell], cell))
         return(move)
+
+    def mine_probabilities(self):
+        """
+        Returns a dict mapping cells that have not been chosen and are not
+        known to be mines to the probability that they are mines: every
+        cell in the knowledge base (the frontier), every cell known to be
+        safe, with probability 0, and one of the other cells. The other
+        cells are unconstrained, so they all share that one probability.
+
+        The frontier is split into independent components, whose
+        consistent mine configurations are counted exactly. If the total
+        number of mines is known, the components and the unconstrained
+        cells are weighted by how many ways the mines left over can be
+        placed, which makes the probabilities exact. Otherwise the
+        unconstrained cells are given the mine density estimated from the
+        frontier and the mines found. A component that can't be counted
+        within the time limit falls back to the mine ratio of its sentences.
+        Only the frontier is looked at, so this doesn't depend on the size
+        of the board.
+        """
+        probabilities = dict()
+        if len(self.safes) > len(self.moves_made):
+            for cell in self.safes - self.moves_made:
+                probabilities[cell] = 0
+        deadline = time.perf_counter() + self.time_limit
+
+        # Mine count distributions of each frontier component, as dicts from
+        # number of mines to (configurations, per-cell counts)
+        distributions = []
+        frontier = set()
+        for cells, sentences in frontier_components(list(self.knowledge)):
+            frontier.update(cells)
+            try:
+                distribution = count_configurations(cells, sentences, deadline)
+            except Timeout:
+                for cell in cells:
+                    probabilities[cell] = max(s.count / len(s.cells)
+                                              for s in sentences
+                                              if cell in s.cells)
+                expected = round(sum(probabilities[cell] for cell in cells))
+                distribution = {expected: (1, [probabilities[cell]
+                                               for cell in cells])}
+            distributions.append((cells, distribution))
+
+        # Every cell known to be neither safe nor a mine is either in the
+        # frontier or unconstrained. A free corner is picked over a random
+        # cell, since having fewer neighbors it's more likely to open up
+        others = len(self.unknown) - len(frontier)
+        other = None
+        if others:
+            corners = [(0, 0), (0, self.width - 1), (self.height - 1, 0),
+                       (self.height - 1, self.width - 1)]
+            other = next((cell for cell in corners
+                          if cell in self.unknown and cell not in frontier),
+                         None) or self.unknown.sample(frontier)
+
+        if self.total_mines is None:
+            # Components are independent; cells outside of them are assumed
+            # to hold mines at the density of the frontier and the mines
+            # found so far, or at even odds before anything is known
+            for cells, distribution in distributions:
+                configurations = sum(ways for ways, _ in distribution.values())
+                for c, cell in enumerate(cells):
+                    if cell not in probabilities:
+                        probabilities[cell] = sum(
+                            per_cell[c] for _, per_cell in distribution.values()
+                        ) / configurations
+            if other is not None:
+                seen = len(frontier) + len(self.mines)
+                expected = sum(probabilities[cell] for cell in frontier)
+                probabilities[other] = ((expected + len(self.mines)) / seen
+                                        if seen else 0.5)
+            return probabilities
+
+        # Weight each combination of component mine counts by the ways to
+        # place the remaining mines among the unconstrained cells
+        left = self.total_mines - len(self.mines)
+
+        def combine(parts):
+            total = {0: 1}
+            for _, distribution in parts:
+                combined = dict()
+                for a, x in total.items():
+                    for b, (ways, _) in distribution.items():
+                        combined[a + b] = combined.get(a + b, 0) + x * ways
+                total = combined
+            return total
+
+        # The binomial coefficients get huge on large boards, so they are
+        # worked out as logarithms and scaled by the largest one, which
+        # cancels out of every probability
+        everything = combine(distributions)
+        logs = {k: math.lgamma(others + 1) - math.lgamma(left - k + 1)
+                   - math.lgamma(others - left + k + 1)
+                for k in everything if 0 <= left - k <= others}
+        scale = max(logs.values(), default=0)
+        weight = {k: math.exp(logs[k] - scale) if k in logs else 0
+                  for k in everything}
+        normalizer = sum(ways * weight[k] for k, ways in everything.items())
+        if not normalizer:
+            for cell in frontier:
+                probabilities.setdefault(cell, 0.5)
+            if other is not None:
+                probabilities[other] = 0.5
+            return probabilities
+
+        for c, (cells, distribution) in enumerate(distributions):
+            rest = combine(distributions[:c] + distributions[c + 1:])
+            mine_ways = [0] * len(cells)
+            for k, (_, per_cell) in distribution.items():
+                factor = sum(x * weight[k + r] for r, x in rest.items())
+                for p, count in enumerate(per_cell):
+                    mine_ways[p] += count * factor
+            for p, cell in enumerate(cells):
+                if cell not in probabilities:
+                    probabilities[cell] = mine_ways[p] / normalizer
+
+        if other is not None:
+            expected = sum(ways * weight[k] * (left - k)
+                           for k, ways in everything.items())
+            probabilities[other] = expected / normalizer / others
+        return probabilities
@@ -0,0 +1,122 @@
+"""
+Plays Minesweeper games between the board and the AI without a display.
+
+Usage: python simulate.py [-H HEIGHT] [-W WIDTH] [-m MINES] [-n GAMES]
+                          [-w WORKERS] [-s SEED] [-t TIME_LIMIT] [-l]
+                          [-i {subset,linear}]
+
+Games are played the way runner.py lets the AI play: it reveals the safe move
+it knows of, or its best guess otherwise, until it hits a mine or every safe
+cell is revealed. Games run in parallel across processes; the report gives
+the win rate, the moves per second and percentiles of the time the AI takes
+per move (choosing the move plus adding what it reveals to its knowledge).
+With -l the games use the NumPy-backed board from large.py, and -i picks the
+AI's inference engine, so the two can be compared on the same games.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(height, width, mines, seed, time_limit, large=False,
+         inference="subset"):
+    """
+    Plays one game seeded with `seed`. Returns (won, per-move latencies in
+    seconds, summed AI stats), where the stats also count the guesses made.
+    """
+    random.seed(seed)
+    if large:
+        from large import LargeMinesweeper
+        game = LargeMinesweeper(height=height, width=width, mines=mines)
+    else:
+        game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       time_limit=time_limit, inference=inference)
+    latencies = []
+    stats = {"guesses": 0}
+    revealed = 0
+    while revealed < height * width - mines:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            stats["guesses"] += 1
+        if move is None or game.is_mine(move):
+            return False, latencies, stats
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+        for key, value in ai.stats.items():
+            stats[key] = stats.get(key, 0) + value
+        revealed += 1
+    return True, latencies, stats
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of sorted `values`.
+    """
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-H", "--height", type=int, default=8)
+    parser.add_argument("-W", "--width", type=int, default=8)
+    parser.add_argument("-m", "--mines", type=int, default=8)
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument("-t", "--time-limit", type=float, default=1.0,
+                        help="seconds the AI may spend on one guess")
+    parser.add_argument("-l", "--large", action="store_true",
+                        help="use the NumPy-backed board (needs numpy)")
+    parser.add_argument("-i", "--inference", choices=["subset", "linear"],
+                        default="subset", help="AI inference engine")
+    args = parser.parse_args()
+    if not 0 < args.mines < args.height * args.width:
+        parser.error("mines must be between 0 and the number of cells")
+
+    n = args.games
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(
+            play, [args.height] * n, [args.width] * n, [args.mines] * n,
+            range(args.seed, args.seed + n), [args.time_limit] * n,
+            [args.large] * n, [args.inference] * n,
+            chunksize=max(1, n // 64)
+        ))
+    elapsed = time.perf_counter() - start
+
+    wins = sum(won for won, _, _ in results)
+    latencies = sorted(t for _, times, _ in results for t in times)
+    stats = dict()
+    for _, _, game_stats in results:
+        for key, value in game_stats.items():
+            stats[key] = stats.get(key, 0) + value
+    moves = len(latencies)
+    guesses = stats.pop("guesses")
+
+    print(f"{args.height}x{args.width} with {args.mines} mines, {n} games "
+          f"in {elapsed:.2f}s ({args.inference} inference)")
+    print(f"Win rate: {wins / n:.1%} ({wins}/{n})")
+    print(f"Moves: {moves} ({moves / elapsed:.0f} per second overall, "
+          f"{moves / max(sum(latencies), 1e-9):.0f} per second of AI time)")
+    print(f"Guesses: {guesses} ({guesses / n:.2f} per game)")
+    print("Latency per move: " + ", ".join(
+        f"p{p} {1000 * percentile(latencies, p):.3f} ms"
+        for p in (50, 90, 99)
+    ) + f", max {1000 * (latencies[-1] if latencies else 0):.3f} ms")
+    for key, value in stats.items():
+        print(f"{key.replace('_', ' ').capitalize()} per move: "
+              f"{value / max(moves, 1):.1f}")
+
+
+if __name__ == "__main__":
+    main()
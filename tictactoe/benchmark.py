@@ -0,0 +1,61 @@
+"""
+Compares the per-node cost of the list-of-lists and bitboard representations.
+
+Usage: python benchmark.py [moves]
+
+Each representation walks the full game tree below the position reached by
+playing the first `moves` cells (default 1) in reading order, using only its
+own terminal/actions/result functions, and reports nodes per second.
+"""
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def walk_list(board):
+    """
+    Returns the number of nodes in the game tree below a list board.
+    """
+    if ttt.terminal(board):
+        return 1
+    return 1 + sum(walk_list(ttt.result(board, action))
+                   for action in ttt.actions(board))
+
+
+def walk_bitboard(state):
+    """
+    Returns the number of nodes in the game tree below a bitboard state.
+    """
+    if ttt.bb_terminal(state):
+        return 1
+    return 1 + sum(walk_bitboard(ttt.bb_result(state, move))
+                   for move in ttt.bb_actions(state))
+
+
+def measure(name, walk, start):
+    began = time.perf_counter()
+    nodes = walk(start)
+    elapsed = time.perf_counter() - began
+    print(f"{name:>9}: {nodes} nodes in {elapsed:.3f}s, "
+          f"{1e6 * elapsed / nodes:.2f} us/node")
+    return elapsed
+
+
+def main():
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    board = ttt.initial_state()
+    for k in range(moves):
+        board = ttt.result(board, divmod(k, 3))
+
+    slow = measure("list", walk_list, board)
+    fast = measure("bitboard", walk_bitboard, ttt.to_bitboard(board))
+    print(f"  speedup: {slow / fast:.1f}x")
+
+    began = time.perf_counter()
+    move = ttt.minimax(board)
+    print(f"  minimax: {move} in {time.perf_counter() - began:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
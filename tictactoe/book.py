@@ -0,0 +1,55 @@
+"""
+Builds the Tic Tac Toe opening book read by tictactoe.minimax.
+
+Usage: python book.py
+
+Solves every position reachable from the empty board once and writes the
+optimal move of each to tictactoe.BOOK_FILE. Among equally valued moves the
+book prefers the fastest win or the slowest loss.
+"""
+import tictactoe as ttt
+
+
+def solve(state, table, memo):
+    """
+    Returns the score of a bitboard state from X's point of view, recording
+    the best move of every non-terminal position below it in `table`.
+    Wins score higher the fewer moves they take.
+    """
+    if state in memo:
+        return memo[state]
+    x, o = state
+    moves_left = 9 - (x | o).bit_count()
+    if ttt.bb_terminal(state):
+        score = ttt.bb_utility(state) * (moves_left + 1)
+    else:
+        x_to_move = ttt.bb_player(state) == ttt.X
+        best_move = score = None
+        for move in ttt.bb_actions(state):
+            v = solve(ttt.bb_result(state, move), table, memo)
+            if score is None or (v > score if x_to_move else v < score):
+                best_move, score = move, v
+        table[ttt.book_index(state)] = best_move
+    memo[state] = score
+    return score
+
+
+def build():
+    """
+    Returns the opening book as bytes.
+    """
+    table = bytearray([ttt.NO_MOVE]) * ttt.BOOK_SIZE
+    solve(ttt.to_bitboard(ttt.initial_state()), table, dict())
+    return bytes(table)
+
+
+def main():
+    book = build()
+    with open(ttt.BOOK_FILE, "wb") as f:
+        f.write(book)
+    positions = sum(move != ttt.NO_MOVE for move in book)
+    print(f"Wrote {positions} positions to {ttt.BOOK_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+m,n,k-game engine: two players take turns on an m x n board and the first to
+get k marks in a row (horizontally, vertically or diagonally) wins. Tic Tac
+Toe is the 3,3,3-game.
+
+Positions use the same bitboard layout as tictactoe.py, generalized to any
+board size: a state is a pair (x, o) of integers where bit n * i + j is set
+when cell (i, j) holds that player's mark. Boards in the list-of-lists format
+used by runner.py can be converted with to_bitboard/from_bitboard.
+
+Exhaustive minimax is hopeless beyond 3x3, so `search` runs an iterative
+deepening alpha-beta search under a time budget, scoring the positions at the
+depth cutoff with a heuristic and caching results in a transposition table
+keyed by Zobrist hashes. `search_parallel` splits the root moves of each
+iteration across a process pool for boards where a move takes seconds.
+"""
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position. Wins found closer to the root score higher.
+WIN = 1_000_000
+
+
+class Timeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class MNKGame():
+
+    def __init__(self, m=3, n=3, k=3, seed=0):
+        """
+        Precomputes, for an m-row, n-column board with k in a row to win:
+            - `lines`: bitmask of every window of k cells in a row
+            - `cell_lines`: the windows going through each cell
+            - `zobrist`: a random 64-bit key per (player, cell)
+            - `order`: cells sorted from the center outwards, used to order
+              moves before any search information is available
+        """
+        if not (1 <= k <= max(m, n)):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+        self.full = (1 << self.size) - 1
+
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    cells = [(i + s * di, j + s * dj) for s in range(k)]
+                    if all(0 <= a < m and 0 <= b < n for a, b in cells):
+                        self.lines.append(
+                            sum(1 << (n * a + b) for a, b in cells))
+        self.cell_lines = [[line for line in self.lines if line >> c & 1]
+                           for c in range(self.size)]
+
+        self.zobrist_seed = seed
+        rng = random.Random(seed)
+        self.zobrist = [[rng.getrandbits(64) for c in range(self.size)]
+                        for p in range(2)]
+
+        center = ((m - 1) / 2, (n - 1) / 2)
+        self.order = sorted(
+            range(self.size),
+            key=lambda c: (abs(c // n - center[0]) + abs(c % n - center[1]), c)
+        )
+
+        # Heuristic weight of a window holding `count` marks of one player
+        # and none of the other
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        self.table = dict()
+        self.nodes = 0
+
+    def initial_state(self):
+        """
+        Returns the empty bitboard state.
+        """
+        return (0, 0)
+
+    def to_bitboard(self, board):
+        """
+        Returns the (x, o) bitboard state of a list-of-lists board.
+        """
+        x = o = 0
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] == X:
+                    x |= 1 << (self.n * i + j)
+                elif board[i][j] == O:
+                    o |= 1 << (self.n * i + j)
+        return (x, o)
+
+    def from_bitboard(self, state):
+        """
+        Returns the list-of-lists board of an (x, o) bitboard state.
+        """
+        x, o = state
+        board = []
+        for i in range(self.m):
+            row = []
+            for j in range(self.n):
+                c = self.n * i + j
+                row.append(X if x >> c & 1 else O if o >> c & 1 else EMPTY)
+            board.append(row)
+        return board
+
+    def player(self, state):
+        """
+        Returns player who has the next turn on a bitboard state.
+        """
+        x, o = state
+        if x.bit_count() == o.bit_count():
+            return X
+        elif x.bit_count() == o.bit_count() + 1:
+            return O
+        raise Exception("Not a valid board")
+
+    def actions(self, state):
+        """
+        Returns the list of empty cells (i, j) of a bitboard state.
+        """
+        taken = state[0] | state[1]
+        return [divmod(c, self.n) for c in range(self.size)
+                if not taken >> c & 1]
+
+    def result(self, state, action):
+        """
+        Returns the bitboard state that results from making move (i, j).
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n):
+            raise Exception("Invalid move...")
+        bit = 1 << (self.n * i + j)
+        x, o = state
+        if (x | o) & bit:
+            raise Exception("Invalid move...")
+        if self.player(state) == X:
+            return (x | bit, o)
+        return (x, o | bit)
+
+    def winner(self, state):
+        """
+        Returns the winner of a bitboard state, if there is one.
+        """
+        x, o = state
+        for line in self.lines:
+            if x & line == line:
+                return X
+            if o & line == line:
+                return O
+        return None
+
+    def terminal(self, state):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(state) is not None
+                or (state[0] | state[1]) == self.full)
+
+    def evaluate(self, own, other):
+        """
+        Returns the heuristic value of a position for the player owning the
+        `own` marks: every window still open to a single player counts for
+        that player, weighted by how many marks it already holds.
+        """
+        score = 0
+        weights = self.weights
+        for line in self.lines:
+            mine = own & line
+            theirs = other & line
+            if not theirs:
+                score += weights[mine.bit_count()]
+            elif not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+    def search(self, state, time_limit=1.0, max_depth=None):
+        """
+        Returns (action, value, depth) for the player to move on a
+        non-terminal state, where `value` is the score from that player's
+        point of view found by the deepest search that finished within
+        `time_limit` seconds (at least depth 1 always completes).
+        """
+        if self.terminal(state):
+            raise ValueError("no moves on a terminal board")
+        x, o = state
+        own, other = (x, o) if self.player(state) == X else (o, x)
+        key = self.hash(state)
+        side = 0 if self.player(state) == X else 1
+
+        empties = self.size - (x | o).bit_count()
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+        deadline = time.perf_counter() + time_limit
+        self.nodes = 0
+
+        best = None
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.negamax(
+                    own, other, side, key, depth, 0, -WIN - 1, WIN + 1,
+                    deadline if best is not None else None
+                )
+            except Timeout:
+                break
+            best = (divmod(move, self.n), value, depth)
+            if abs(value) >= WIN - self.size:
+                break
+        return best
+
+    def search_parallel(self, state, time_limit=1.0, max_depth=None,
+                        workers=None):
+        """
+        Same as `search`, but each iteration spreads the root moves over a
+        pool of `workers` processes (default: one per CPU). The best move so
+        far is searched first to set a bound; the remaining moves then run
+        in parallel, each starting from the best score any worker has
+        published so far, so late moves are refuted with a narrow window.
+        """
+        if self.terminal(state):
+            raise ValueError("no moves on a terminal board")
+        x, o = state
+        own, other = (x, o) if self.player(state) == X else (o, x)
+        key = self.hash(state)
+        side = 0 if self.player(state) == X else 1
+
+        empties = self.size - (x | o).bit_count()
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+        deadline = time.time() + time_limit
+        moves = [c for c in self.order if not (x | o) >> c & 1]
+
+        # Moves that win on the spot need no search
+        for c in moves:
+            child = own | (1 << c)
+            if any(child & line == line for line in self.cell_lines[c]):
+                return divmod(c, self.n), WIN, 1
+
+        bound = multiprocessing.Value("q", -WIN - 1)
+        best = None
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(self.m, self.n, self.k, self.zobrist_seed, bound)
+        ) as pool:
+            for depth in range(1, max_depth + 1):
+                limit = deadline if best is not None else None
+                with bound.get_lock():
+                    bound.value = -WIN - 1
+                job = (own, other, side, key, depth, limit)
+
+                values = dict()
+                first = pool.submit(_search_root_move, job, moves[0])
+                values[moves[0]] = first.result()
+                if values[moves[0]] is None:
+                    break
+                pending = {pool.submit(_search_root_move, job, c): c
+                           for c in moves[1:]}
+                while pending and None not in values.values():
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        values[pending.pop(future)] = future.result()
+                if None in values.values():
+                    for future in pending:
+                        future.cancel()
+                    break
+
+                # Moves that failed low against a published bound only return
+                # an upper bound, so exact scores win ties
+                move = max(moves, key=lambda c: values[c])
+                value = values[move][0]
+                best = (divmod(move, self.n), value, depth)
+                moves.remove(move)
+                moves.insert(0, move)
+                if abs(value) >= WIN - self.size:
+                    break
+        return best
+
+    def hash(self, state):
+        """
+        Returns the Zobrist hash of a bitboard state.
+        """
+        x, o = state
+        key = 0
+        for c in range(self.size):
+            if x >> c & 1:
+                key ^= self.zobrist[0][c]
+            elif o >> c & 1:
+                key ^= self.zobrist[1][c]
+        return key
+
+    def best_move(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns the action (i, j) chosen for the player to move on a
+        list-of-lists board, or None if the game is over.
+        """
+        state = self.to_bitboard(board)
+        if self.terminal(state):
+            return None
+        return self.search(state, time_limit, max_depth)[0]
+
+    def negamax(self, own, other, side, key, depth, ply, alpha, beta,
+                deadline):
+        """
+        Returns (value, move) of the position where the player owning `own`
+        (0 for X, 1 for O, as `side`) is to move, searched `depth` plies
+        deep with an alpha-beta window. The last opponent move has already
+        been checked for a win.
+        """
+        self.nodes += 1
+        if deadline is not None and not self.nodes & 1023:
+            if time.perf_counter() > deadline:
+                raise Timeout
+        taken = own | other
+        if taken == self.full:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(own, other), None
+
+        alpha_start = alpha
+        entry = self.table.get(key)
+        hint = None
+        if entry is not None:
+            entry_depth, entry_value, entry_flag, hint = entry
+            if entry_depth >= depth:
+                if entry_flag == 0:
+                    return entry_value, hint
+                elif entry_flag > 0:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value, hint
+
+        moves = [c for c in self.order if not taken >> c & 1]
+        if hint is not None:
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        best_value, best_move = -WIN - 1, moves[0]
+        zobrist = self.zobrist[side]
+        for c in moves:
+            child = own | (1 << c)
+            if any(child & line == line for line in self.cell_lines[c]):
+                value = WIN - ply
+            else:
+                value, _ = self.negamax(
+                    other, child, 1 - side, key ^ zobrist[c], depth - 1,
+                    ply + 1, -beta, -alpha, deadline
+                )
+                value = -value
+            if value > best_value:
+                best_value, best_move = value, c
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        # Win scores depend on the ply they were found at, so only store
+        # them as bounds relative to this node
+        if best_value <= alpha_start:
+            flag = -1
+        elif best_value >= beta:
+            flag = 1
+        else:
+            flag = 0
+        if abs(best_value) < WIN - self.size:
+            self.table[key] = (depth, best_value, flag, best_move)
+        else:
+            self.table[key] = (0, 0, 0, best_move)
+        return best_value, best_move
+
+
+# State of a search_parallel worker process: its own engine, whose
+# transposition table persists across the root moves it is handed, and the
+# best root score published by any worker in the current iteration.
+_worker_game = None
+_worker_bound = None
+
+
+def _init_worker(m, n, k, seed, bound):
+    global _worker_game, _worker_bound
+    _worker_game = MNKGame(m, n, k, seed)
+    _worker_bound = bound
+
+
+def _search_root_move(job, c):
+    """
+    Returns (score, exact) for playing root cell `c`, where `exact` is False
+    when the score is only an upper bound because it did not beat the
+    published bound, or None if the time budget ran out first.
+    """
+    own, other, side, key, depth, deadline = job
+    game = _worker_game
+    if deadline is not None:
+        deadline = time.perf_counter() + (deadline - time.time())
+    alpha = _worker_bound.value
+    try:
+        value, _ = game.negamax(
+            other, own | (1 << c), 1 - side, key ^ game.zobrist[side][c],
+            depth - 1, 1, -WIN - 1, -alpha, deadline
+        )
+    except Timeout:
+        return None
+    value = -value
+    with _worker_bound.get_lock():
+        if value > _worker_bound.value:
+            _worker_bound.value = value
+    return value, value > alpha
@@ -19,12 +19,14 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_move = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if ai_move is not None:
+                ai_move.cancel()
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +110,14 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, computed in the background so the window keeps
+        # responding; the move is shown no sooner than half a second
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = ttt.minimax_async(board)
+            elif ai_move.done() and time.time() - ai_move.started >= 0.5:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +142,8 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    if ai_move is not None:
+                        ai_move.cancel()
+                    ai_move = None
 
     pygame.display.flip()
@@ -1,8 +1,11 @@
 """
 Tic Tac Toe Player
 """
-import copy
 import math
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 
 X = "X"
 O = "O"
@@ -62,11 +65,13 @@ def result(board, action):
     Returns the board that results from making move (i, j) on the board.
     """
     #Checking if the action is valid
-    if action not in actions(board):
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3) or board[i][j] is not EMPTY:
         raise Exception("Invalid move...")
-    #We make a copy of the board before the move and change the corresponding cell's value to the corresponding player's value
-    new_board = copy.deepcopy(board)
-    new_board[action[0]][action[1]] = player(board)
+    #We make a copy of the board before the move and change the corresponding cell's value to the corresponding player's value.
+    #Cells hold immutable strings, so copying each row is enough.
+    new_board = [row[:] for row in board]
+    new_board[i][j] = player(board)
     return(new_board)
 
 
@@ -135,42 +140,243 @@ def min_value(board):
     return v
 
 
-def minimax(board):
+def minimax(board, cancelled=None):
     """
     Returns the optimal action for the current player on the board.
+    If the `cancelled` event gets set, the search stops by raising CancelledError.
     """
     #If the game is over, return None
-    if terminal(board):
+    state = to_bitboard(board)
+    if bb_terminal(state):
         return None
-    #Variable declaration
-    act = actions(board)
-    values = []
-    moves = []
-    i = -1
-    #If it's x's turn, try to maximize, if it's o's turn, try to minimize.
-    if player(board)=="X":    
-        for action in act:
-            i+=1
-            values.append( min_value(result(board,action)) )
-            moves.append( action )
-        m = max(values)
-    elif player(board)=="O":
-        for action in act:
-            i+=1
-            values.append( max_value(result(board,action)) )
-            moves.append( action )
-        m = min(values)      
-    else:
-        raise Exception("Fatal error. Self-destruction in 10 seconds...")
-     
-    #Check and return the optimal move for the AI
-    for i in range(i+1):
-        if values[i]==m:
-            return moves[i]
-        
-    raise Exception("Unexpected end of code. Minimax")
-    
-    
+    #Every reachable position is solved ahead of time by book.py, so look the move up and only search if there's no book.
+    book = load_book()
+    if book is not None and book[book_index(state)] != NO_MOVE:
+        return divmod(book[book_index(state)], 3)
+    return divmod(bb_minimax(state, cancelled), 3)
+
+
+#The AI thinks in a single background thread, so runner.py can keep drawing and reading input while it does.
+_executor = ThreadPoolExecutor(max_workers=1)
+
+
+class AsyncMove():
+    """
+    Handle on a minimax call running in the background. The game loop polls
+    `done()` each frame, and calls `cancel()` if the board it was asked about
+    is thrown away.
+    """
+
+    def __init__(self, board):
+        self.started = time.time()
+        self.cancelled = threading.Event()
+        self.future = _executor.submit(minimax, board, self.cancelled)
+
+    def done(self):
+        """
+        Returns True once the move is ready (or the search was cancelled).
+        """
+        return self.future.done()
+
+    def result(self):
+        """
+        Returns the chosen action, waiting for it if it isn't ready yet.
+        """
+        return self.future.result()
+
+    def cancel(self):
+        """
+        Stops the search. Its result must not be used afterwards.
+        """
+        self.cancelled.set()
+        self.future.cancel()
+
+
+def minimax_async(board):
+    """
+    Starts computing minimax(board) in the background and returns its AsyncMove.
+    """
+    return AsyncMove(board)
+
 
+# Bitboard representation. A state is a pair (x, o) of 9-bit masks where bit
+# 3 * i + j is set when cell (i, j) holds that player's mark. Moves are cell
+# indices in range(9).
+FULL = (1 << 9) - 1
+
+WIN_MASKS = tuple(
+    sum(1 << (3 * i + j) for i, j in line)
+    for line in (
+        [[(i, j) for j in range(3)] for i in range(3)] +
+        [[(i, j) for i in range(3)] for j in range(3)] +
+        [[(k, k) for k in range(3)], [(k, 2 - k) for k in range(3)]]
+    )
+)
+
+
+def to_bitboard(board):
+    """
+    Returns the (x, o) bitboard state of a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def from_bitboard(state):
+    """
+    Returns the list-of-lists board of an (x, o) bitboard state.
+    """
+    x, o = state
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def bb_player(state):
+    """
+    Returns player who has the next turn on a bitboard state.
+    """
+    x, o = state
+    nX, nO = x.bit_count(), o.bit_count()
+    if nX == nO:
+        return X
+    elif nX == nO + 1:
+        return O
+    raise Exception("Not a valid board")
+
+
+def bb_actions(state):
+    """
+    Returns the list of empty cell indices of a bitboard state.
+    """
+    free = FULL & ~(state[0] | state[1])
+    return [k for k in range(9) if free >> k & 1]
 
-    
\ No newline at end of file
+
+def bb_result(state, move):
+    """
+    Returns the bitboard state that results from playing cell index `move`.
+    """
+    x, o = state
+    bit = 1 << move
+    if (x | o) & bit:
+        raise Exception("Invalid move...")
+    if x.bit_count() == o.bit_count():
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def bb_winner(state):
+    """
+    Returns the winner of a bitboard state, if there is one.
+    """
+    x, o = state
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def bb_terminal(state):
+    """
+    Returns True if the game on a bitboard state is over, False otherwise.
+    """
+    return bb_winner(state) is not None or (state[0] | state[1]) == FULL
+
+
+def bb_utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return {X: 1, O: -1, None: 0}[bb_winner(state)]
+
+
+def bb_value(x, o, x_to_move):
+    """
+    Returns the minimax value of a non-terminal bitboard position.
+    """
+    best = -2 if x_to_move else 2
+    free = FULL & ~(x | o)
+    while free:
+        bit = free & -free
+        free ^= bit
+        if x_to_move:
+            child = x | bit
+            if any(child & mask == mask for mask in WIN_MASKS):
+                return 1
+            v = 0 if (child | o) == FULL else bb_value(child, o, False)
+            if v > best:
+                best = v
+        else:
+            child = o | bit
+            if any(child & mask == mask for mask in WIN_MASKS):
+                return -1
+            v = 0 if (x | child) == FULL else bb_value(x, child, True)
+            if v < best:
+                best = v
+    return best
+
+
+def bb_minimax(state, cancelled=None):
+    """
+    Returns the optimal cell index for the current player on a non-terminal
+    bitboard state. Ties are broken towards the lowest index. The `cancelled`
+    event is checked before each root move.
+    """
+    x, o = state
+    x_to_move = bb_player(state) == X
+    best_move, best_value = None, None
+    for move in bb_actions(state):
+        if cancelled is not None and cancelled.is_set():
+            raise CancelledError()
+        child = bb_result(state, move)
+        v = bb_utility(child) if bb_terminal(child) else bb_value(*child, not x_to_move)
+        if best_value is None or (v > best_value if x_to_move else v < best_value):
+            best_move, best_value = move, v
+    return best_move
+
+
+# Opening book. book.py writes one byte per position, indexed by reading the
+# board as a base-3 number (empty 0, X 1, O 2), holding the optimal cell index
+# or NO_MOVE for terminal and unreachable positions.
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_SIZE = 3 ** 9
+NO_MOVE = 255
+
+# Base-3 value of each 9-bit mask read as a number of 0/1 digits
+TERNARY = tuple(sum(3 ** k for k in range(9) if mask >> k & 1)
+                for mask in range(1 << 9))
+
+_book = None
+
+
+def book_index(state):
+    """
+    Returns the opening book index of a bitboard state.
+    """
+    x, o = state
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def load_book():
+    """
+    Returns the opening book as bytes, or None if the book file is missing
+    or malformed. The file is only read once.
+    """
+    global _book
+    if _book is None:
+        try:
+            with open(BOOK_FILE, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        _book = data if len(data) == BOOK_SIZE else b""
+    return _book or None